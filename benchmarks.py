@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for launch option resolution against synthetic large settings.
+Run with: python benchmarks.py [--quick] [--against REV] [--update-baseline] [--threshold 0.25]
+
+Results are compared against the same benchmarks run on the tree of a git
+revision (--against), or else against a JSON baseline (benchmarks.baseline.json
+by default), and the script exits with status 1 when a benchmark regressed by
+more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+# Add current directory to path to import run.py
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from unittest.mock import patch
+from run import get_final_args_details, parse_launch_option
+
+DEFAULT_BASELINE_PATH = os.path.join(ROOT, "benchmarks.baseline.json")
+PROFILE_COUNTS = [10, 100, 1000, 10000]
+OPTION_COUNTS = [10, 100, 1000]
+QUICK_PROFILE_COUNTS = [10, 1000]
+QUICK_OPTION_COUNTS = [10, 100]
+# Options sharing a valueId, i.e. the number of values in a dropdown
+VALUE_ID_GROUP_SIZE = 25
+ENV_VARIABLE_MERGES = [
+    {"id": "winedlloverrides", "name": "WINEDLLOVERRIDES", "delimiter": ";"},
+    {"id": "mangohud-config", "name": "MANGOHUD_CONFIG", "delimiter": ","},
+]
+
+PARSE_COMMANDS = {
+    "simple": "SteamDeck=1 %command%",
+    "quoted": 'ENABLE_VKBASALT=1 WINEDLLOVERRIDES="ScriptHook=n,b;dinput8=n,b;AdvancedHook=n,b" ~/lsfg %command% -norestrictions -width 1280',
+    "gamescope": "MANGOHUD=1 gamemoderun gamescope -w 1280 -h 720 -W 1920 -H 1080 -f --mangoapp -- %command% -novid -console +fps_max 60",
+    "long-no-command": "MANGOHUD=1 mangohud " + " ".join(f"-arg{i} {i}" for i in range(200)),
+    "long-env": "MANGOHUD_CONFIG=" + ",".join(f"key{i}={i}" for i in range(500)) + " %command%",
+}
+
+
+def make_launch_option(index, rng):
+    kind = index % 5
+    if kind == 0:
+        on = f"WINEDLLOVERRIDES=\"dll{index}=n,b;other{index}=n,b\" %command%"
+    elif kind == 1:
+        on = f"MANGOHUD_CONFIG=\"cpu_temp,gpu_temp,fps_limit={index}\" mangohud %command%"
+    elif kind == 2:
+        on = f"gamescope -w 1280 -h 800 -r {index} -- %command%"
+    elif kind == 3:
+        on = f"%command% -arg{index} +set value{index} 1"
+    else:
+        on = f"ENV_{index}=1 gamemoderun %command%"
+
+    # Every other block of options forms a dropdown of VALUE_ID_GROUP_SIZE values
+    group = index // VALUE_ID_GROUP_SIZE
+    value_id = f"group-{group}" if group % 2 else ""
+    return {
+        "id": f"option-{index}",
+        "name": f"Option {group if value_id else index}",
+        "on": on,
+        "off": f"OFF_{index}=1" if kind == 4 else "",
+        "enableGlobally": rng.random() < 0.2,
+        "group": f"Tab {group % 4}",
+        "valueId": value_id,
+        "valueName": f"Value {index}" if value_id else "",
+        "fallbackValue": bool(value_id) and index % VALUE_ID_GROUP_SIZE == 0,
+        "priority": rng.choice([0, 0, 0, 1, 5, 10]),
+    }
+
+
+def make_settings(profile_count, option_count, seed=0):
+    rng = random.Random(seed)
+    launch_options = [make_launch_option(index, rng) for index in range(option_count)]
+    option_ids = [option["id"] for option in launch_options]
+    profiles = {}
+    for index in range(profile_count):
+        state = {option_id: rng.random() < 0.7 for option_id in rng.sample(option_ids, min(10, option_count))}
+        profiles[str(1000 + index)] = {
+            "state": state,
+            "originalLaunchOptions": "PROTON_LOG=1 %command% -dx11" if index % 3 == 0 else "",
+        }
+    return {
+        "profiles": profiles,
+        "launchOptions": launch_options,
+        "envVariableMerges": ENV_VARIABLE_MERGES,
+    }
+
+
+def measure(func, repeat, number=1):
+    """Return the best time of `repeat` runs of `number` calls, in microseconds per call."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1_000_000, 2)
+
+
+def benchmark_parse_launch_option(results, repeat):
+    for name, raw_command in PARSE_COMMANDS.items():
+        key = f"parse_launch_option/{name}"
+        results[key] = measure(lambda: parse_launch_option(raw_command), repeat, 200)
+        print(f"{key:<55} {results[key]:>12.2f} us")
+
+
+def benchmark_get_final_args_details(results, repeat, profile_counts, option_counts):
+    original_argv = sys.argv
+    sys.argv = ["run.py", "/path/to/game", "AppId=1000"]
+    try:
+        with patch("shutil.which", return_value="/usr/bin/fake"), patch.dict(os.environ):
+            for profile_count in profile_counts:
+                for option_count in option_counts:
+                    settings = make_settings(profile_count, option_count)
+                    key = f"get_final_args_details/{profile_count}-profiles/{option_count}-options"
+                    results[key] = measure(lambda: get_final_args_details(settings, "1000"), repeat, 5)
+                    print(f"{key:<55} {results[key]:>12.2f} us")
+    finally:
+        sys.argv = original_argv
+
+
+def benchmark_run_process(results, repeat, profile_counts, option_counts):
+    # `true` exits right away, so the process time is the launcher's start-to-exec time
+    true_path = shutil.which("true") or "true"
+    for profile_count in profile_counts:
+        for option_count in option_counts:
+            with tempfile.TemporaryDirectory() as home:
+                settings_folder_path = os.path.join(home, ".dlo")
+                os.makedirs(settings_folder_path)
+                with open(os.path.join(settings_folder_path, "settings.json"), "w", encoding="utf-8") as f:
+                    json.dump(make_settings(profile_count, option_count), f, indent=4)
+
+                # With the interpreter flags of the launcher script
+                command = [sys.executable, "-E", "-s", "-S", os.path.join(ROOT, "run.py"), true_path, "AppId=1000"]
+                env = dict(os.environ, HOME=home)
+                key = f"run.py/{profile_count}-profiles/{option_count}-options"
+                results[key] = measure(lambda: subprocess.run(command, env=env, check=False), repeat)
+                print(f"{key:<55} {results[key]:>12.2f} us")
+
+
+def benchmark_revision(revision, quick, repeat):
+    """Run these benchmarks on the tree of a git revision and return its results."""
+    with tempfile.TemporaryDirectory() as tree:
+        archive = subprocess.run(["git", "-C", ROOT, "archive", revision], capture_output=True, check=True)
+        subprocess.run(["tar", "-x", "-C", tree], input=archive.stdout, check=True)
+        # The revision may predate this script, or have another version of it
+        shutil.copy(os.path.abspath(__file__), tree)
+        baseline_path = os.path.join(tree, "benchmarks.baseline.json")
+        command = [
+            sys.executable, os.path.join(tree, "benchmarks.py"),
+            "--repeat", str(repeat), "--baseline", baseline_path, "--update-baseline",
+        ]
+        if quick:
+            command.append("--quick")
+        print(f"Benchmarks of {revision}")
+        subprocess.run(command, check=True)
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+
+def compare_with_baseline(results, baseline, threshold):
+    regressions = []
+    print("\n" + "="*60)
+    print(f"Comparison with baseline (threshold: +{threshold:.0%})")
+    print("="*60)
+    for key, value in results.items():
+        baseline_value = baseline.get(key)
+        if not baseline_value:
+            print(f"{key:<55} {'(new)':>12}")
+            continue
+        change = value / baseline_value - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<55} {change:>+11.1%} {'✗ REGRESSION' if regressed else '✓'}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="only run the smaller settings sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the best one is kept")
+    parser.add_argument("--against", metavar="REV", help="compare with the git revision REV, run now on this machine")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="path of the JSON baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing")
+    options = parser.parse_args()
+
+    profile_counts = QUICK_PROFILE_COUNTS if options.quick else PROFILE_COUNTS
+    option_counts = QUICK_OPTION_COUNTS if options.quick else OPTION_COUNTS
+
+    baseline = {}
+    if options.against:
+        baseline = benchmark_revision(options.against, options.quick, options.repeat)
+        print()
+    elif os.path.exists(options.baseline):
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print("Launch Resolution Benchmarks")
+    print("="*60)
+    results = {}
+    benchmark_parse_launch_option(results, options.repeat)
+    benchmark_get_final_args_details(results, options.repeat, profile_counts, option_counts)
+    benchmark_run_process(results, options.repeat, profile_counts, option_counts)
+
+    regressions = compare_with_baseline(results, baseline, options.threshold) if baseline else []
+
+    if options.update_baseline:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": {**baseline, **results}}, f, indent=4)
+        print(f"\nBaseline written to {options.baseline}")
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark(s) regressed")
+        sys.exit(1)
+    print("\nAll benchmarks completed!")
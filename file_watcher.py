@@ -0,0 +1,147 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Seconds changes are collected for before being reported together
+COALESCE_DELAY = 0.2
+# Seconds between two checks when inotify is unavailable
+POLL_INTERVAL = 2
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    Report changes to a set of files, each mapped to an event name.
+
+    The parent directories are watched with inotify, so files replaced with
+    os.replace() or created later are still seen. A directory also reports
+    its entries being created or removed. Where inotify is not
+    available the files are stat'ed every POLL_INTERVAL seconds instead.
+    Changes happening within COALESCE_DELAY are reported with a single call
+    to on_change(event_names).
+    """
+
+    def __init__(self, paths, on_change, delay=COALESCE_DELAY, poll_interval=POLL_INTERVAL):
+        self.paths = {os.path.abspath(path): event for path, event in paths.items()}
+        self.on_change = on_change
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self.loop = None
+        self.fd = None
+        self.watches = {}
+        self.poll_task = None
+        self.pending = set()
+        self.flush_handle = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        libc = _load_libc()
+        if libc is not None and self._start_inotify(libc):
+            return
+        self.poll_task = self.loop.create_task(self._poll())
+
+    def stop(self):
+        if self.fd is not None:
+            self.loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.pending.clear()
+
+    def _start_inotify(self, libc):
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+
+        folder_paths = {os.path.dirname(path) for path in self.paths}
+        folder_paths.update(path for path in self.paths if os.path.isdir(path))
+        for folder_path in folder_paths:
+            wd = libc.inotify_add_watch(fd, os.fsencode(folder_path), WATCH_MASK)
+            # Folders that do not exist yet are not watched
+            if wd >= 0:
+                self.watches[wd] = folder_path
+
+        if not self.watches:
+            os.close(fd)
+            return False
+
+        self.fd = fd
+        self.loop.add_reader(fd, self._read_inotify_events)
+        return True
+
+    def _read_inotify_events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                folder_path = self.watches.get(wd)
+                if folder_path is None or not name:
+                    continue
+                event = self.paths.get(os.path.join(folder_path, os.fsdecode(name)))
+                if event is None:
+                    # An entry of a watched directory
+                    event = self.paths.get(folder_path)
+                if event is not None:
+                    self._add_change(event)
+
+    def _get_signature(self, path):
+        try:
+            path_stat = os.stat(path)
+        except OSError:
+            return None
+        return (path_stat.st_ino, path_stat.st_mtime_ns, path_stat.st_size)
+
+    async def _poll(self):
+        signatures = {path: self._get_signature(path) for path in self.paths}
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for path, event in self.paths.items():
+                signature = self._get_signature(path)
+                if signature != signatures[path]:
+                    signatures[path] = signature
+                    self._add_change(event)
+
+    def _add_change(self, event):
+        self.pending.add(event)
+        if self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(self.delay, self._flush)
+
+    def _flush(self):
+        self.flush_handle = None
+        events, self.pending = self.pending, set()
+        if events:
+            self.on_change(events)
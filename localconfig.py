@@ -0,0 +1,86 @@
+import re
+
+# One token of a text VDF file after optional whitespace: a quoted string, a
+# brace, a comment or an unquoted string
+TOKEN_PATTERN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|([{}])|//[^\n]*|([^\s{}"]+))', re.DOTALL)
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ESCAPES = {"n": "\n", "t": "\t"}
+CHUNK_SIZE = 64 * 1024
+
+
+def _unescape(value):
+    if "\\" not in value:
+        return value
+    return ESCAPE_PATTERN.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def iter_vdf_tokens(file, chunk_size=CHUNK_SIZE):
+    """
+    Yield the tokens of a text VDF file as ("string", value), ("{", None) or
+    ("}", None), reading it in chunks so the whole file is never in memory.
+    """
+    buffer = ""
+    eof = False
+    while True:
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+        position = 0
+        while True:
+            match = TOKEN_PATTERN.match(buffer, position)
+            # A token reaching the end of the chunk may continue in the next one
+            if match is None or (not eof and match.end() == len(buffer)):
+                break
+            position = match.end()
+            quoted, brace, bare = match.groups()
+            if quoted is not None:
+                yield "string", _unescape(quoted)
+            elif brace is not None:
+                yield brace, None
+            elif bare is not None:
+                yield "string", bare
+        buffer = buffer[position:]
+
+        if eof:
+            if buffer.strip():
+                raise ValueError(f"Invalid VDF near: {buffer[:40]!r}")
+            return
+
+
+def iter_launch_options(file, chunk_size=CHUNK_SIZE):
+    """
+    Yield (appid, launch options) for every app of a localconfig.vdf file,
+    found under the "apps" section of the Steam software settings.
+    """
+    path = []
+    key = None
+    for kind, value in iter_vdf_tokens(file, chunk_size):
+        if kind == "string":
+            if key is None:
+                key = value
+                continue
+            if (
+                key.lower() == "launchoptions"
+                and len(path) >= 2
+                and path[-2].lower() == "apps"
+                and path[-1].isdigit()
+            ):
+                yield path[-1], value
+            key = None
+        elif kind == "{":
+            if key is None:
+                raise ValueError("Invalid VDF: section without a name")
+            path.append(key)
+            key = None
+        else:
+            if not path:
+                raise ValueError("Invalid VDF: unbalanced braces")
+            path.pop()
+            key = None
+
+
+def read_launch_options(path):
+    """Return the launch options of every app set in a localconfig.vdf file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return dict(iter_launch_options(file))
@@ -1,8 +1,17 @@
 import asyncio
-from datetime import datetime
+import gzip
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import json
+import math
 import os
+import re
+import shlex
+import shutil
+import sqlite3
 import stat
+import sys
 from pathlib import Path
 
 # The decky plugin module is located at decky-loader/plugin
@@ -10,19 +19,200 @@ from pathlib import Path
 # and add the `decky-loader/plugin/imports` path to `python.analysis.extraPaths` in `.vscode/settings.json`
 import decky
 
+if decky.DECKY_PLUGIN_DIR not in sys.path:
+    sys.path.insert(0, decky.DECKY_PLUGIN_DIR)
+
+from shared import (
+    DEFAULT_PLAN_PATH,
+    GENERATION_PATH,
+    LAUNCH_JOURNAL_PATH,
+    PLANS_PATH,
+    RESOLVER_FOLDER_PATH,
+    RESOLVER_SOCKET_PATH,
+    SETTINGS_DB_GENERATION_PATH,
+    SETTINGS_DB_PATH,
+    SETTINGS_JOURNAL_PATH,
+)
+from run import (
+    LAUNCH_RECORD_SIZE,
+    MAX_LAUNCH_RECORDS,
+    ExecutableResolver,
+    SettingsModel,
+    add_parsed_launch_option,
+    apply_settings_patch,
+    build_final_args,
+    format_launch_record,
+    get_launch_journal_head_path,
+    get_launch_plan_path,
+    get_settings as read_settings,
+    get_settings_generation,
+    get_settings_key,
+    get_settings_model,
+    get_settings_signature,
+    load_executable_cache,
+    read_launch_records,
+    read_launch_records_since,
+    read_settings_journal,
+    read_settings_snapshot,
+    resolve_launch_commands,
+    resolve_launch_plan,
+    save_executable_cache,
+    split_launch_option,
+)
+from settings_store import SettingsStore
+from localconfig import read_launch_options
+from file_watcher import FileWatcher
+
 SETTINGS_FOLDER_NAME = '.dlo'
 SETTINGS_FOLDER_PATH = os.path.join(os.path.expanduser('~'), SETTINGS_FOLDER_NAME)
 SETTINGS_PATH = f"{os.path.join(SETTINGS_FOLDER_PATH, 'settings.json')}"
-DEBUG_LOG_PATH = f"{os.path.join(SETTINGS_FOLDER_PATH, 'debug.log')}"
 BACKUPS_PATH = f"{os.path.join(SETTINGS_FOLDER_PATH, 'backups')}"
+SETTINGS_EXPORT_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'settings.export.json')
+BACKUP_OBJECTS_PATH = os.path.join(BACKUPS_PATH, 'objects')
+BACKUP_POLICY_PATH = os.path.join(BACKUPS_PATH, 'policy.json')
+# Characters of a backup command listed in the backup index
+BACKUP_PREVIEW_LENGTH = 120
+# keepLast/maxAgeDays of None keep every backup, compressAbove of None never compresses.
+# keepLast is at least 1, the most recent backup of an app is always kept.
+DEFAULT_BACKUP_POLICY = {"keepLast": None, "maxAgeDays": None, "compressAbove": 256}
+# Seconds to wait after a large settings edit before collecting its garbage
+SETTINGS_GC_DELAY = 60
+# Patch operations making an edit large enough to collect garbage after it
+SETTINGS_GC_EDIT_SIZE = 100
+# Seconds a launcher has to send its request to the resolver
+RESOLVER_REQUEST_TIMEOUT = 1
+# Seconds between two background compactions of the backups
+BACKUP_COMPACTION_INTERVAL = 24 * 60 * 60
 
 PY_LAUNCHER_PATH = os.path.join(decky.DECKY_PLUGIN_DIR, "run.py")
+# run.py only needs the standard library: the PYTHON* env vars of the game and
+# the site module are skipped to start the interpreter faster
+PYTHON_LAUNCHER_FLAGS = ["-E", "-s", "-S"]
 
 SH_COMMAND_NAME = "run"
 SHORT_SH_COMMAND_PATH = os.path.join('~', SETTINGS_FOLDER_NAME, SH_COMMAND_NAME)
 FULL_SH_COMMAND_PATH = os.path.join(SETTINGS_FOLDER_PATH, SH_COMMAND_NAME)
 COMMAND = f"{SHORT_SH_COMMAND_PATH} %command%"
 
+# The settings journal is compacted into settings.json once it grows this large
+MAX_SETTINGS_JOURNAL_SIZE = 64 * 1024
+# Seconds without patches after which the settings journal is compacted
+SETTINGS_JOURNAL_COMPACTION_DELAY = 5
+# set_settings calls made within this many seconds are written to disk once
+SETTINGS_WRITE_DELAY = 0.25
+
+# Body of the generated launcher. It execs straight from the pre-rendered shell
+# plan of the app and only starts run.py when that plan is missing or stale.
+SH_LAUNCHER_BODY = r"""
+# Microseconds since the epoch, used for launch stage timings
+DLO_START="${EPOCHREALTIME//[!0-9]/}"
+DLO_LAST="$DLO_START"
+DLO_TIMINGS=""
+
+dlo_mark() {
+    local now="${EPOCHREALTIME//[!0-9]/}"
+    DLO_TIMINGS+="${DLO_TIMINGS:+,}\"$1\":$((now - DLO_LAST))"
+    DLO_LAST="$now"
+}
+
+dlo_prefix() {
+    if type -P "$1" &> /dev/null || [[ -f "$1" ]]; then
+        DLO_PREFIX_ARGS+=("$@")
+    fi
+}
+
+dlo_suffix() {
+    DLO_SUFFIX_ARGS+=("$@")
+}
+
+dlo_find_plan() {
+    local arg appid=""
+    for arg in "$@"; do
+        if [[ "$arg" == *AppId=* ]]; then
+            appid="${arg#*=}"
+            appid="${appid%%=*}"
+            break
+        fi
+    done
+    if [[ -z "$appid" ]]; then
+        appid="$STEAM_COMPAT_APP_ID"
+    fi
+
+    DLO_APPID="$appid"
+    if [[ -z "$appid" ]]; then
+        DLO_PLAN="$DLO_PLANS/default.sh"
+    elif [[ "$appid" =~ ^[0-9]+$ ]]; then
+        DLO_PLAN="$DLO_PLANS/$appid.sh"
+        [[ -f "$DLO_PLAN" ]] || DLO_PLAN="$DLO_PLANS/default.sh"
+    else
+        return 1
+    fi
+
+    # Plans are published with the generation file, after the settings they
+    # were compiled from, and with the generation of the SQLite store if any
+    [[ -f "$DLO_PLAN" && ! "$DLO_SETTINGS" -nt "$DLO_PLANS/generation" ]] || return 1
+    local generation="" store_generation="" plans_store_generation=""
+    read -r store_generation 2> /dev/null < "$DLO_STORE_GENERATION"
+    read -r generation plans_store_generation 2> /dev/null < "$DLO_PLANS/generation" || return 1
+    [[ "$plans_store_generation" == "$store_generation" ]]
+}
+
+dlo_json_array() {
+    local arg value separator=""
+    DLO_JSON+="["
+    for arg in "$@"; do
+        value="${arg//\\/\\\\}"
+        value="${value//\"/\\\"}"
+        value="${value//$'\n'/\\n}"
+        value="${value//$'\r'/\\r}"
+        value="${value//$'\t'/\\t}"
+        DLO_JSON+="$separator\"$value\""
+        separator=","
+    done
+    DLO_JSON+="]"
+}
+
+dlo_write_launch_record() {
+    # Byte lengths, so that every record has the same size as run.py's
+    local LC_ALL=C timestamp appid="null" sequence=""
+    printf -v timestamp '%(%Y-%m-%dT%H:%M:%S)T' -1
+    [[ -n "$DLO_APPID" ]] && appid="\"$DLO_APPID\""
+    read -r sequence < "$DLO_JOURNAL/head"
+    [[ "$sequence" =~ ^[0-9]+$ ]] || sequence=0
+
+    DLO_JSON="{\"timestamp\":\"$timestamp\",\"appid\":$appid,\"source\":\"shell\",\"sequence\":$sequence,\"args\":"
+    dlo_json_array "$@"
+    DLO_JSON+=",\"final_args\":"
+    dlo_json_array "${DLO_ARGS[@]}"
+    DLO_JSON+=",\"env_vars\":$DLO_ENV_JSON"
+    dlo_mark record
+    DLO_JSON+=",\"timings\":{$DLO_TIMINGS}}"
+    if (( ${#DLO_JSON} >= DLO_RECORD_SIZE )); then
+        DLO_JSON="{\"timestamp\":\"$timestamp\",\"appid\":$appid,\"source\":\"shell\",\"sequence\":$sequence,\"truncated\":true}"
+    fi
+
+    # Written in place like run.py does, the slot before the head
+    printf '%s%*s\n' "$DLO_JSON" $((DLO_RECORD_SIZE - 1 - ${#DLO_JSON})) "" 1<> "$DLO_JOURNAL/$((sequence % DLO_RECORD_SLOTS))"
+    printf '%s\n' $((sequence + 1)) 1<> "$DLO_JOURNAL/head"
+}
+
+DLO_PREFIX_ARGS=()
+DLO_SUFFIX_ARGS=()
+DLO_ENV_JSON="{}"
+if [[ -n "$1" ]] && dlo_find_plan "$@" && dlo_mark settings && source "$DLO_PLAN"; then
+    dlo_mark prefixes
+    DLO_ARGS=("${DLO_PREFIX_ARGS[@]}" "$@" "${DLO_SUFFIX_ARGS[@]}")
+    dlo_write_launch_record "$@" 2> /dev/null
+    exec "${DLO_ARGS[@]}"
+fi
+
+if [[ -x "$DLO_PYTHON" && -f "$DLO_LAUNCHER" ]]; then
+    DLO_LAUNCH_START="$DLO_START" exec "$DLO_PYTHON" "${DLO_PYTHON_FLAGS[@]}" "$DLO_LAUNCHER" "$@"
+fi
+exec "$@"
+"""
+SH_ENV_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 info = {
     "SETTINGS_FOLDER_NAME": SETTINGS_FOLDER_NAME,
     "SETTINGS_FOLDER_PATH": SETTINGS_FOLDER_PATH,
@@ -31,8 +221,13 @@ info = {
     "SHORT_SH_COMMAND_PATH": SHORT_SH_COMMAND_PATH,
     "FULL_SH_COMMAND_PATH": FULL_SH_COMMAND_PATH,
     "COMMAND": COMMAND,
-    "DEBUG_LOG_PATH": DEBUG_LOG_PATH,
+    "LAUNCH_JOURNAL_PATH": LAUNCH_JOURNAL_PATH,
     "BACKUPS_PATH": BACKUPS_PATH,
+    "PLANS_PATH": PLANS_PATH,
+    "SETTINGS_JOURNAL_PATH": SETTINGS_JOURNAL_PATH,
+    "SETTINGS_DB_PATH": SETTINGS_DB_PATH,
+    "SETTINGS_EXPORT_PATH": SETTINGS_EXPORT_PATH,
+    "RESOLVER_SOCKET_PATH": RESOLVER_SOCKET_PATH,
 }
 
 
@@ -41,26 +236,119 @@ def log(str):
 
 
 class Plugin:
+    # Parsed settings and the identity of the files they were read from
+    _settings_cache = (None, None)
+    # Identity of the settings files as last written by the plugin
+    _written_settings_key = None
+    # Open SQLite settings store, when that backend is enabled
+    _settings_store = None
+    # Pending garbage collection of the settings after a large edit
+    _settings_gc_handle = None
+    # Pending compaction of the settings journal after the last patch
+    _settings_journal_handle = None
+    # Background task applying the backup retention policy
+    _backup_compaction_task = None
+    # Reports changes to the settings and the launch journal to the frontend,
+    # and Steam's userdata changes to the caches below
+    _file_watcher = None
+    # Resolves launches for run.py while the plugin is loaded
+    _resolver_server = None
+    # Executable lookups of the resolver, in the format of the executable cache
+    _resolver_executable_cache = None
+    # Found once, Steam users are cached until userdata changes
+    _steam_path = None
+    _steam_users_cache = None
+    # Apps whose launch options in localconfig.vdf run the plugin
+    _managed_appids_cache = None
+    # Digests of the launch plan files as last written or read, by path
+    _launch_plan_digests = None
+    # Single thread running every write, in the order they were requested
+    _write_executor = None
+    # Latest settings passed to set_settings and not queued for writing yet
+    _pending_settings = None
+    _pending_settings_written = None
+    _pending_settings_timer = None
+
+    def _queue_pending_settings(self):
+        """Queue the pending settings on the I/O worker, ahead of any later write."""
+        if self._pending_settings is None:
+            return
+
+        data, written = self._pending_settings, self._pending_settings_written
+        self._pending_settings_timer.cancel()
+        self._pending_settings = self._pending_settings_written = self._pending_settings_timer = None
+
+        def on_written(future):
+            if future.exception() is not None:
+                written.set_exception(future.exception())
+            else:
+                written.set_result(None)
+
+        future = asyncio.get_running_loop().run_in_executor(self._get_write_executor(), self._set_settings, data)
+        future.add_done_callback(on_written)
+
+    def _get_write_executor(self):
+        if self._write_executor is None:
+            self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dlo-writer")
+        return self._write_executor
+
+    async def _run_write(self, func, *args):
+        """Run a write on the I/O worker, after every write requested before it."""
+        self._queue_pending_settings()
+        return await asyncio.get_running_loop().run_in_executor(self._get_write_executor(), func, *args)
+
+    async def flush_writes(self):
+        """Wait until every requested write, including pending settings, is on disk."""
+        await self._run_write(lambda: None)
+
     async def prepare(self):
         folder_path = Path(SETTINGS_FOLDER_PATH)
         folder_path.mkdir(parents=True, exist_ok=True)
+        # Steam's launch options are imported once, before the first backup
+        first_run = not os.path.exists(BACKUPS_PATH)
         await self.backup_existing_original_launch_options()
+        if first_run:
+            result = await self.import_localconfig_launch_options()
+            if result and result["imported"]:
+                # Settings the frontend did not ask for
+                await decky.emit("settings_changed")
+        try:
+            await self._run_write(self._migrate_legacy_backups)
+        except (OSError, IOError, ValueError) as e:
+            log(f"Failed to migrate backups: {e}")
+        await self.compact_settings_journal()
+        await self.compile_launch_plans()
+        Path(LAUNCH_JOURNAL_PATH).mkdir(parents=True, exist_ok=True)
+        # Replaced by the ring of slots in LAUNCH_JOURNAL_PATH
+        Path(SETTINGS_FOLDER_PATH, "launches.journal").unlink(missing_ok=True)
+
+        # Resolve the interpreter once instead of on every launch
+        python_path = shutil.which("python") or shutil.which("python3") or ""
 
         try:
             with open(FULL_SH_COMMAND_PATH, "w") as file:
                 file.write("#!/bin/bash\n")
-                file.write(f"if command -v python &> /dev/null && [ -f \"{PY_LAUNCHER_PATH}\" ]; then\n")
-                file.write(f"    python \"{PY_LAUNCHER_PATH}\" \"$@\"\n")
-                file.write("else\n")
-                file.write("    exec \"$@\"\n")
-                file.write("fi\n")
+                file.write(f"DLO_PYTHON={shlex.quote(python_path)}\n")
+                file.write(f"DLO_PYTHON_FLAGS=({' '.join(PYTHON_LAUNCHER_FLAGS)})\n")
+                file.write(f"DLO_LAUNCHER={shlex.quote(PY_LAUNCHER_PATH)}\n")
+                file.write(f"DLO_SETTINGS={shlex.quote(SETTINGS_PATH)}\n")
+                file.write(f"DLO_PLANS={shlex.quote(PLANS_PATH)}\n")
+                file.write(f"DLO_STORE_GENERATION={shlex.quote(SETTINGS_DB_GENERATION_PATH)}\n")
+                file.write(f"DLO_JOURNAL={shlex.quote(LAUNCH_JOURNAL_PATH)}\n")
+                file.write(f"DLO_RECORD_SIZE={LAUNCH_RECORD_SIZE}\n")
+                file.write(f"DLO_RECORD_SLOTS={MAX_LAUNCH_RECORDS}\n")
+                file.write(SH_LAUNCHER_BODY)
 
             current_stat = os.stat(FULL_SH_COMMAND_PATH)
             os.chmod(FULL_SH_COMMAND_PATH, current_stat.st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
         except (OSError, IOError) as e:
             raise RuntimeError(f"Failed to create or configure launcher script: {e}")
 
-    async def get_steam_path(self) -> Path:
+    def _get_steam_path(self) -> Path:
+        # Steam does not move while the plugin runs, the first match is kept
+        if self._steam_path is not None:
+            return self._steam_path
+
         steam_paths = [
             Path.home() / ".steam" / "steam",
             Path.home() / ".local" / "share" / "Steam",
@@ -73,33 +361,75 @@ class Plugin:
 
         for path in steam_paths:
             if path.exists():
+                self._steam_path = path
                 return path
 
         raise FileNotFoundError("Steam installation not found")
 
-    async def get_localconfig_vdf_path(self) -> Path:
-        userdata_path = (await self.get_steam_path()) / "userdata"
-
-        if not userdata_path.exists():
-            raise FileNotFoundError(f"Steam userdata directory not found at: {userdata_path}")
+    def _get_steam_users(self):
+        """
+        Return the Steam users found in userdata, most recently modified
+        first. The listing is cached until the file watcher sees userdata or
+        a localconfig.vdf change, so cached lookups touch no file.
+        """
+        if self._steam_users_cache is not None:
+            return self._steam_users_cache
 
+        userdata_path = self._get_steam_path() / "userdata"
         try:
             # Find user directories (numeric directories)
             user_dirs = [d for d in userdata_path.iterdir() if d.is_dir() and d.name.isdigit()]
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Steam userdata directory not found at: {userdata_path}") from e
         except PermissionError as e:
             raise PermissionError(f"Permission denied accessing userdata directory: {userdata_path}") from e
 
-        if not user_dirs:
+        users = []
+        for user_dir in sorted(user_dirs, key=lambda user_dir: user_dir.stat().st_mtime, reverse=True):
+            localconfig_path = user_dir / "config" / "localconfig.vdf"
+            users.append({
+                "id": user_dir.name,
+                "path": user_dir,
+                "localconfig": localconfig_path if localconfig_path.exists() else None,
+            })
+        self._steam_users_cache = users
+        return users
+
+    async def get_steam_path(self) -> Path:
+        return self._get_steam_path()
+
+    async def get_steam_users(self):
+        try:
+            return [
+                {
+                    "id": user["id"],
+                    "path": str(user["path"]),
+                    "localconfig": str(user["localconfig"]) if user["localconfig"] else None,
+                }
+                for user in self._get_steam_users()
+            ]
+        except (OSError, IOError) as e:
+            log(f"Failed to get Steam users: {e}")
+            return []
+
+    def _get_localconfig_vdf_path(self) -> Path:
+        users = self._get_steam_users()
+        if not users:
             raise FileNotFoundError("No Steam user directories found")
 
         # Use the most recently modified user directory
-        user_dir = max(user_dirs, key=lambda x: x.stat().st_mtime)
-        localconfig_path = user_dir / "config" / "localconfig.vdf"
+        user = users[0]
+        if user["localconfig"] is None:
+            # Written by Steam after the user directory was created
+            localconfig_path = user["path"] / "config" / "localconfig.vdf"
+            if not localconfig_path.exists():
+                raise FileNotFoundError(f"localconfig.vdf not found at: {localconfig_path}")
+            user["localconfig"] = localconfig_path
 
-        if not localconfig_path.exists():
-            raise FileNotFoundError(f"localconfig.vdf not found at: {localconfig_path}")
+        return user["localconfig"]
 
-        return localconfig_path
+    async def get_localconfig_vdf_path(self) -> Path:
+        return self._get_localconfig_vdf_path()
 
     async def debug_logs(self):
         log("------------ Debug logs")
@@ -123,6 +453,38 @@ class Plugin:
             log(f"Failed to write JSON to {file_path}: {e}")
             raise
 
+    def _write_settings_snapshot(self, settings):
+        """
+        Publish settings as a new snapshot, stamped with the next generation.
+
+        The snapshot is written and synced to a temporary file that replaces
+        settings.json in one rename, so a launch reading the settings at the
+        same time sees either the previous snapshot or this one, never a torn
+        file. Returns the settings as written.
+        """
+        generation = max(get_settings_generation(self._read_settings()), get_settings_generation(settings)) + 1
+        settings = {**settings, "generation": generation}
+        tmp_path = f"{SETTINGS_PATH}.{os.getpid()}.tmp"
+        try:
+            Path(SETTINGS_FOLDER_PATH).mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, SETTINGS_PATH)
+
+            # Make the rename itself durable
+            folder_fd = os.open(SETTINGS_FOLDER_PATH, os.O_RDONLY)
+            try:
+                os.fsync(folder_fd)
+            finally:
+                os.close(folder_fd)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to write settings snapshot: {e}")
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return settings
+
     def _read_json(self, file_path):
         path = Path(file_path)
         if not path.exists():
@@ -137,31 +499,945 @@ class Plugin:
     async def has_shell_script(self):
         return os.path.exists(FULL_SH_COMMAND_PATH)
 
-    async def get_debug_log(self):
-        path = Path(DEBUG_LOG_PATH)
-        if not path.exists():
-            return None
+    def _get_debug_log(self, appid, offset):
+        records = read_launch_records(appid, offset, 1)
+        return format_launch_record(records[0]) if records else None
+
+    async def get_debug_log(self, appid=None, offset=0):
         try:
-            return await asyncio.to_thread(path.read_text)
+            return await asyncio.to_thread(self._get_debug_log, appid, offset)
         except (OSError, IOError):
             return None
 
+    def _get_debug_log_since(self, cursor, appid):
+        # The latest new record may belong to another app
+        result = read_launch_records_since(cursor, appid, 1 if appid is None else MAX_LAUNCH_RECORDS)
+        records = result.pop("records")
+        return {**result, "log": format_launch_record(records[-1]) if records else None}
+
+    async def get_debug_log_since(self, cursor=None, appid=None):
+        """Return the debug log of the latest launch recorded after cursor, if any."""
+        try:
+            return await asyncio.to_thread(self._get_debug_log_since, cursor, appid)
+        except (OSError, IOError):
+            return {"cursor": cursor, "log": None, "reset": False}
+
+    async def get_launch_records_since(self, cursor=None, appid=None, limit=20):
+        try:
+            return await asyncio.to_thread(read_launch_records_since, cursor, appid, limit)
+        except (OSError, IOError):
+            return {"cursor": cursor, "records": [], "reset": False}
+
+    async def get_launch_history(self, appid=None, offset=0, limit=20):
+        try:
+            return await asyncio.to_thread(read_launch_records, appid, offset, limit)
+        except (OSError, IOError):
+            return []
+
+    def _get_launch_timings(self, appid):
+        records = read_launch_records(appid, 0, MAX_LAUNCH_RECORDS)
+
+        def summarize(timings_list):
+            stages = {}
+            for timings in timings_list:
+                for stage, duration in timings.items():
+                    stages.setdefault(stage, []).append(duration)
+                stages.setdefault("total", []).append(sum(timings.values()))
+
+            summary = {}
+            for stage, durations in stages.items():
+                durations.sort()
+                summary[stage] = {"count": len(durations), "max": durations[-1]}
+                for percentile in (50, 90, 99):
+                    # Nearest-rank percentile, in microseconds
+                    rank = math.ceil(len(durations) * percentile / 100)
+                    summary[stage][f"p{percentile}"] = durations[max(rank, 1) - 1]
+            return summary
+
+        timings_by_appid = {}
+        for record in records:
+            timings = record.get("timings")
+            if isinstance(timings, dict) and timings:
+                timings_by_appid.setdefault(str(record.get("appid")), []).append(timings)
+
+        return {
+            "stages": summarize(timings for app_timings in timings_by_appid.values() for timings in app_timings),
+            "apps": {app: summarize(app_timings) for app, app_timings in timings_by_appid.items()},
+        }
+
+    async def get_launch_timings(self, appid=None):
+        try:
+            return await asyncio.to_thread(self._get_launch_timings, appid)
+        except (OSError, IOError) as e:
+            log(f"Failed to get launch timings: {e}")
+            return {"stages": {}, "apps": {}}
+
     async def get_info(self):
         return info
 
+    def _get_settings_store(self):
+        """Return the SQLite settings store, or None when settings are stored as JSON."""
+        if not os.path.exists(SETTINGS_DB_PATH):
+            if self._settings_store is not None:
+                self._settings_store.close()
+                self._settings_store = None
+            return None
+
+        if self._settings_store is None:
+            self._settings_store = SettingsStore()
+        return self._settings_store
+
+    def _get_settings_files_key(self):
+        settings_store = self._get_settings_store()
+        if settings_store is not None:
+            # Commits made by the plugin itself update the cache directly
+            return ("sqlite", settings_store.get_data_version())
+
+        key = []
+        for path in (SETTINGS_PATH, SETTINGS_JOURNAL_PATH):
+            try:
+                file_stat = os.stat(path)
+                key.append((file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size))
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def _cache_written_settings(self, settings):
+        # The files as left by the plugin, so the file watcher can tell its
+        # own writes from changes made by the launcher, another device or by hand
+        self._written_settings_key = self._get_settings_files_key()
+        self._settings_cache = (self._written_settings_key, settings)
+
+    def _read_settings(self):
+        """
+        Return the settings, parsed again only when the settings files changed.
+
+        The files are identified by inode, mtime and size, so edits made outside
+        of the plugin are still picked up. The returned settings are shared and
+        must not be modified.
+        """
+        key = self._get_settings_files_key()
+        cached_key, cached_settings = self._settings_cache
+        if key == cached_key:
+            return cached_settings
+
+        settings_store = self._get_settings_store()
+        settings = settings_store.read_settings() if settings_store is not None else read_settings()
+        self._settings_cache = (key, settings)
+        return settings
+
+    def _get_settings_model_key(self, settings):
+        # Patches in the SQLite store don't change any file but bump the generation
+        return (get_settings_key(), get_settings_generation(settings))
+
+    def _add_parsed_launch_options(self, settings):
+        # Saved with the settings so launches don't have to parse the options
+        launch_options = settings.get("launchOptions")
+        if not isinstance(launch_options, list):
+            return settings
+        return {**settings, "launchOptions": [add_parsed_launch_option(option) for option in launch_options]}
+
+    def _set_settings(self, data):
+        data = self._add_parsed_launch_options(data)
+        previous_settings = self._settings_cache[1]
+        if isinstance(previous_settings, dict) and len(previous_settings.get("launchOptions") or []) > len(
+            data.get("launchOptions") or []
+        ):
+            # Deleted launch options may have left state behind
+            self._on_large_settings_edit()
+        settings_store = self._get_settings_store()
+        if settings_store is not None:
+            data = {**data, "generation": settings_store.write_settings(data)}
+        else:
+            data = self._write_settings_snapshot(data)
+            # The journal was written against the previous snapshot
+            Path(SETTINGS_JOURNAL_PATH).unlink(missing_ok=True)
+        self._cache_written_settings(data)
+        try:
+            self._compile_launch_plans(data)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to compile launch plans: {e}")
+
     async def set_settings(self, data):
-        return await asyncio.to_thread(self._write_json, SETTINGS_PATH, data)
+        # A burst of calls is coalesced into a single write of the latest settings
+        loop = asyncio.get_running_loop()
+        if self._pending_settings is None:
+            self._pending_settings_written = loop.create_future()
+            self._pending_settings_timer = loop.call_later(SETTINGS_WRITE_DELAY, self._queue_pending_settings)
+        self._pending_settings = data
+        await asyncio.shield(self._pending_settings_written)
 
     async def get_settings(self):
-        return await asyncio.to_thread(self._read_json, SETTINGS_PATH)
+        if self._pending_settings is not None:
+            return self._pending_settings
+        return await asyncio.to_thread(self._read_settings)
+
+    def _patch_settings(self, ops):
+        if not isinstance(ops, list):
+            raise ValueError(f"Invalid settings patch: {ops}")
+        ops = [
+            {**op, "option": add_parsed_launch_option(op.get("option"))}
+            if isinstance(op, dict) and op.get("op") == "upsert_launch_option" else op
+            for op in ops
+        ]
+
+        settings = self._read_settings()
+        if not isinstance(settings, dict):
+            settings = {}
+        # Patched on copies, the cached settings stay untouched if the patch is invalid
+        settings = {
+            **settings,
+            "profiles": dict(settings.get("profiles") or {}),
+            "launchOptions": list(settings.get("launchOptions") or []),
+        }
+        # Validates the whole patch before anything is written
+        appids = apply_settings_patch(settings, ops)
+        if len(ops) >= SETTINGS_GC_EDIT_SIZE or any(op.get("op") == "delete_launch_option" for op in ops):
+            self._on_large_settings_edit()
+
+        settings_store = self._get_settings_store()
+        if settings_store is not None:
+            settings["generation"] = settings_store.apply_patch(ops)
+            self._cache_written_settings(settings)
+            try:
+                if appids is None:
+                    self._compile_launch_plans(settings)
+                else:
+                    self._compile_app_launch_plans(settings, appids)
+            except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+                log(f"Failed to compile launch plans: {e}")
+            return
+
+        entry = {"settings": get_settings_generation(settings), "file": get_settings_signature(), "ops": ops}
+        entry = json.dumps(entry, separators=(',', ':')) + "\n"
+        Path(SETTINGS_FOLDER_PATH).mkdir(parents=True, exist_ok=True)
+        fd = os.open(SETTINGS_JOURNAL_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, entry.encode('utf-8'))
+            os.fsync(fd)
+            journal_size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        self._cache_written_settings(settings)
+        self._on_settings_journaled()
+
+        try:
+            if journal_size >= MAX_SETTINGS_JOURNAL_SIZE:
+                self._compact_settings(settings)
+            elif appids is None:
+                self._compile_launch_plans(settings)
+            else:
+                self._compile_app_launch_plans(settings, appids)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to compile launch plans: {e}")
+
+    async def patch_settings(self, ops):
+        """Apply field-level patch operations as a single transaction."""
+        try:
+            await self._run_write(self._patch_settings, ops)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to patch settings: {e}")
+            raise
+
+    async def set_profile_state(self, appid, launch_option_id, value):
+        await self.patch_settings([
+            {"op": "set_profile_state", "appid": str(appid), "id": launch_option_id, "value": value},
+        ])
+
+    async def upsert_launch_option(self, launch_option):
+        await self.patch_settings([{"op": "upsert_launch_option", "option": launch_option}])
+
+    async def apply_launch_option_to_apps(self, launch_option_id, appids, value):
+        await self.patch_settings([
+            {"op": "set_profile_state", "appid": str(appid), "id": launch_option_id, "value": value}
+            for appid in appids
+        ])
+
+    def _compact_settings(self, settings):
+        settings = self._write_settings_snapshot(settings)
+        Path(SETTINGS_JOURNAL_PATH).unlink(missing_ok=True)
+        self._cache_written_settings(settings)
+        # Plans are checked against the settings file, which just changed
+        self._compile_launch_plans(settings)
+
+    def _compact_settings_journal(self):
+        """
+        Fold the settings journal into settings.json.
+
+        Patches journaled before settings.json was edited by hand are replayed
+        on top of the edited file rather than dropped, so changes made in the
+        UI survive the edit. The UI wins where both changed the same field.
+        """
+        if not os.path.exists(SETTINGS_JOURNAL_PATH):
+            return
+        if self._get_settings_store() is not None:
+            # Left behind by the JSON backend
+            Path(SETTINGS_JOURNAL_PATH).unlink(missing_ok=True)
+            return
+
+        settings, signature = read_settings_snapshot()
+        if not isinstance(settings, dict):
+            if os.path.exists(SETTINGS_PATH):
+                # Possibly still being written by hand, compacted on its next change
+                log("Not compacting the settings journal, settings.json is not valid JSON")
+                return
+            settings = {}
+        generation = get_settings_generation(settings)
+        ops = read_settings_journal(generation, signature, any_file=True)
+        replayed = len(ops) - len(read_settings_journal(generation, signature))
+        if replayed:
+            log(f"settings.json was edited by hand, replaying {replayed} journaled patch operations on top of it")
+        settings = {
+            **settings,
+            "profiles": dict(settings.get("profiles") or {}),
+            "launchOptions": list(settings.get("launchOptions") or []),
+        }
+        apply_settings_patch(settings, ops)
+        self._compact_settings(settings)
+
+    async def compact_settings_journal(self):
+        try:
+            await self._run_write(self._compact_settings_journal)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to compact settings journal: {e}")
+
+    def _get_plugin_managed_appids(self):
+        """
+        Return the apps whose Steam launch options run the plugin, or None
+        when unknown. Cached until the file watcher sees localconfig.vdf change.
+        """
+        if self._managed_appids_cache is not None:
+            return self._managed_appids_cache
+        try:
+            launch_options = read_launch_options(self._get_localconfig_vdf_path())
+        except (OSError, IOError, ValueError):
+            return None
+        self._managed_appids_cache = {
+            appid for appid, command in launch_options.items() if self._is_dlo_launch_options_command(command)
+        }
+        return self._managed_appids_cache
+
+    def _collect_settings_garbage(self, settings, managed_appids):
+        """
+        Return a copy of the settings without the profile state that cannot
+        change how an app launches, and the number of entries removed:
+
+        - state of launch options that no longer exist
+        - state equal to enableGlobally, for options outside valueId groups
+        - state of a valueId group that selects the group's default value
+        - profiles left empty, unless their app still runs the plugin, since
+          the profile is what restores its launch options on unload.
+          Profiles are only removed when managed_appids is known.
+        """
+        model = SettingsModel(settings)
+        profiles = {}
+        removed_state = 0
+        removed_profiles = 0
+        for appid, profile in settings["profiles"].items():
+            if not isinstance(profile, dict):
+                profiles[appid] = profile
+                continue
+
+            state = {}
+            for launch_option_id, value in (profile.get("state") or {}).items():
+                indexes = model.indexes_by_id.get(launch_option_id)
+                if indexes and not all(
+                    not model.options[index].get("valueId", "")
+                    and model.options[index].get("enableGlobally", False) == value
+                    for index in indexes
+                ):
+                    state[launch_option_id] = value
+
+            # A group's state can only go when no state of it affects another group
+            for value_id, selected in model.get_selected_value_ids(state).items():
+                group = set(model.value_id_groups[value_id])
+                group_ids = [
+                    launch_option_id for launch_option_id in state
+                    if group & set(model.indexes_by_id[launch_option_id])
+                ]
+                if selected == model.default_selection[value_id] and all(
+                    set(model.indexes_by_id[launch_option_id]) <= group for launch_option_id in group_ids
+                ):
+                    for launch_option_id in group_ids:
+                        del state[launch_option_id]
+
+            removed_state += len(profile.get("state") or {}) - len(state)
+            profile = {**profile, "state": state}
+            is_empty = not state and not any(value for key, value in profile.items() if key != "state")
+            if is_empty and managed_appids is not None and str(appid) not in managed_appids:
+                removed_profiles += 1
+                continue
+            profiles[appid] = profile
+
+        return {**settings, "profiles": profiles}, removed_state, removed_profiles
+
+    def _compact_settings_garbage(self):
+        settings = self._read_settings()
+        if not isinstance(settings, dict) or not isinstance(settings.get("profiles"), dict):
+            return None
+        settings = {**settings, "launchOptions": list(settings.get("launchOptions") or [])}
+
+        compacted, removed_state, removed_profiles = self._collect_settings_garbage(
+            settings,
+            self._get_plugin_managed_appids(),
+        )
+        if removed_state or removed_profiles:
+            self._set_settings(compacted)
+
+        # Measured as the settings file is written
+        bytes_saved = len(json.dumps(settings, indent=4)) - len(json.dumps(compacted, indent=4))
+        return {"removed_state": removed_state, "removed_profiles": removed_profiles, "bytes_saved": bytes_saved}
+
+    async def compact_settings(self):
+        """Collect the garbage of the settings and report what was removed."""
+        try:
+            result = await self._run_write(self._compact_settings_garbage)
+            if result and (result["removed_state"] or result["removed_profiles"]):
+                log(f"Compacted settings: {result}")
+            return result
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to compact settings: {e}")
+            return None
+
+    def _schedule_settings_gc(self):
+        # Postponed by every large edit, so a series of edits is collected once
+        if self._settings_gc_handle is not None:
+            self._settings_gc_handle.cancel()
+        self._settings_gc_handle = self.loop.call_later(
+            SETTINGS_GC_DELAY,
+            lambda: asyncio.ensure_future(self._compact_settings_in_background()),
+        )
+
+    def _schedule_settings_journal_compaction(self):
+        # Postponed by every patch, so settings.json is rewritten once a
+        # series of edits is over
+        if self._settings_journal_handle is not None:
+            self._settings_journal_handle.cancel()
+        self._settings_journal_handle = self.loop.call_later(
+            SETTINGS_JOURNAL_COMPACTION_DELAY,
+            lambda: asyncio.ensure_future(self.compact_settings_journal()),
+        )
+
+    def _on_settings_journaled(self):
+        # Called from the write thread
+        loop = getattr(self, "loop", None)
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._schedule_settings_journal_compaction)
+
+    async def _compact_settings_in_background(self):
+        # Not requested by the frontend, which is told about it like about
+        # changes made outside of the plugin
+        result = await self.compact_settings()
+        if result and (result["removed_state"] or result["removed_profiles"]):
+            await decky.emit("settings_changed")
+
+    def _on_large_settings_edit(self):
+        # Called from the write thread
+        loop = getattr(self, "loop", None)
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._schedule_settings_gc)
+
+    def _read_generation(self):
+        try:
+            return int(Path(GENERATION_PATH).read_text(encoding='utf-8').split()[0])
+        except (OSError, IOError, ValueError, IndexError):
+            return 0
+
+    def _publish_generation(self, generation, settings):
+        """
+        Make the plans of a generation visible, along with the generation of
+        the SQLite store and the signature of the settings file they were
+        compiled from. The launchers check the plans against both.
+        """
+        published = str(generation)
+        if self._get_settings_store() is not None:
+            published += f" {get_settings_generation(settings)}"
+        generation_tmp_path = Path(f"{GENERATION_PATH}.tmp")
+        generation_tmp_path.write_text(f"{published}\n{json.dumps(get_settings_signature())}\n", encoding='utf-8')
+        os.replace(generation_tmp_path, GENERATION_PATH)
+
+    def _compile_launch_plans(self, settings):
+        """
+        Compile the launch plans of every app and publish them as a new
+        generation. Only the plan files whose content changed are written.
+        """
+        plans_path = Path(PLANS_PATH)
+        plans_path.mkdir(parents=True, exist_ok=True)
+
+        generation = self._read_generation() + 1
+        contents = {}
+        executables = set()
+
+        def add_plan(path, appid):
+            plan = resolve_launch_plan(settings, appid, model)
+            executables.update(prefix[0] for prefix in plan["prefixes"] if prefix)
+            contents.update(self._get_launch_plan_contents(path, plan))
+
+        # Without valid settings no plan is written and run.py launches the
+        # command untouched, like it does when settings.json is missing.
+        has_valid_settings = (
+            isinstance(settings, dict)
+            and isinstance(settings.get("profiles"), dict)
+            and isinstance(settings.get("launchOptions"), list)
+        )
+        if has_valid_settings:
+            model = get_settings_model(settings, self._get_settings_model_key(settings))
+            add_plan(DEFAULT_PLAN_PATH, None)
+            for appid in settings["profiles"]:
+                plan_path = get_launch_plan_path(appid)
+                if plan_path:
+                    add_plan(plan_path, appid)
+
+        changed = [
+            (path, content) for path, content in contents.items()
+            if not self._is_launch_plan_current(path, content)
+        ]
+        if changed:
+            # Launches resolve the settings themselves until every plan is written
+            Path(GENERATION_PATH).unlink(missing_ok=True)
+            for path, content in changed:
+                self._write_launch_plan_file(path, content)
+
+        for plan_path in plans_path.iterdir():
+            # Temporary files are left behind by interrupted writes
+            if plan_path.suffix == ".tmp" or (plan_path.suffix in (".json", ".sh") and plan_path not in contents):
+                plan_path.unlink(missing_ok=True)
+                self._get_launch_plan_digests().pop(plan_path, None)
+
+        # Publishing the generation last makes every plan above visible at once
+        self._publish_generation(generation, settings)
+
+        try:
+            self._update_executable_cache(executables)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to update executable cache: {e}")
+
+    def _compile_app_launch_plans(self, settings, appids):
+        """
+        Recompile the launch plans of some apps only.
+
+        The plans keep the current generation, so the plans of the other apps
+        stay valid. Everything is recompiled when there is no generation yet.
+        """
+        generation = self._read_generation()
+        if not generation:
+            self._compile_launch_plans(settings)
+            return
+
+        model = get_settings_model(settings, self._get_settings_model_key(settings))
+        contents = {}
+        executables = set()
+        for appid in appids:
+            plan_path = get_launch_plan_path(appid)
+            if not plan_path or appid not in settings["profiles"]:
+                continue
+            plan = resolve_launch_plan(settings, appid, model)
+            executables.update(prefix[0] for prefix in plan["prefixes"] if prefix)
+            contents.update(self._get_launch_plan_contents(plan_path, plan))
+
+        changed = [
+            (path, content) for path, content in contents.items()
+            if not self._is_launch_plan_current(path, content)
+        ]
+        if changed:
+            # Journaled patches leave settings.json untouched, so nothing else
+            # tells the launchers these plans are outdated until written
+            Path(GENERATION_PATH).unlink(missing_ok=True)
+            for path, content in changed:
+                self._write_launch_plan_file(path, content)
+        # The SQLite store moved to a new generation with these apps' changes
+        if changed or self._get_settings_store() is not None:
+            self._publish_generation(generation, settings)
+
+        try:
+            self._update_executable_cache(executables)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to update executable cache: {e}")
+
+    def _get_launch_plan_contents(self, path, plan):
+        """Return the content of a launch plan file and of its shell rendering, by path."""
+        plan_path = Path(path)
+        return {
+            plan_path: json.dumps(plan, indent=4),
+            plan_path.with_suffix(".sh"): self._render_shell_plan(plan),
+        }
+
+    def _get_launch_plan_digests(self):
+        if self._launch_plan_digests is None:
+            self._launch_plan_digests = {}
+        return self._launch_plan_digests
+
+    def _is_launch_plan_current(self, path, content):
+        """
+        Tell whether a plan file already has this content. The file is only
+        read when the digest of its content is not known yet.
+        """
+        digests = self._get_launch_plan_digests()
+        digest = hashlib.sha256(content.encode('utf-8')).digest()
+        if digests.get(path) == digest:
+            return path.exists()
+
+        try:
+            if path.read_text(encoding='utf-8') != content:
+                return False
+        except (OSError, IOError, ValueError):
+            return False
+        digests[path] = digest
+        return True
+
+    def _write_launch_plan_file(self, path, content):
+        """Replace a plan file atomically."""
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, path)
+        self._get_launch_plan_digests()[path] = hashlib.sha256(content.encode('utf-8')).digest()
+
+    def _update_executable_cache(self, executables):
+        """Resolve prefix executables ahead of launches for every known PATH."""
+        executables = {executable for executable in executables if "/" not in executable and "~" not in executable}
+        cache = load_executable_cache()
+        search_paths = list(cache) + [os.environ.get("PATH", os.defpath)]
+        for search_path in dict.fromkeys(search_paths):
+            executable_resolver = ExecutableResolver(cache, search_path)
+            for executable in executables:
+                executable_resolver.which(executable)
+            if executable_resolver.changed:
+                executable_resolver.store()
+        save_executable_cache(cache)
+
+    def _render_shell_plan(self, plan):
+        """Render a launch plan as a script sourced by the generated launcher."""
+        env_vars = sorted(plan["env_vars"].items())
+        if not all(SH_ENV_NAME_PATTERN.match(key) for key, _ in env_vars):
+            # Bash cannot export these, let run.py apply them instead
+            return "return 1\n"
+
+        lines = []
+        for key, value in env_vars:
+            lines.append(f"export {shlex.quote(f'{key}={value}')}")
+        if env_vars:
+            lines.append(f"DLO_ENV_JSON={shlex.quote(json.dumps(dict(env_vars), separators=(',', ':')))}")
+
+        home = os.path.expanduser("~")
+        for prefix in plan["prefixes"]:
+            expanded_prefix = [part.replace("~", home) for part in prefix]
+            lines.append(f"dlo_prefix {shlex.join(expanded_prefix)}")
+        if plan["suffixes"]:
+            lines.append(f"dlo_suffix {shlex.join(plan['suffixes'])}")
+
+        return "\n".join(lines) + "\n"
+
+    def _compile_current_launch_plans(self):
+        self._compile_launch_plans(self._read_settings())
+
+    def _set_settings_store(self, name):
+        if name not in ("json", "sqlite"):
+            raise ValueError(f"Invalid settings store: {name}")
+
+        settings_store = self._get_settings_store()
+        if (settings_store is not None) == (name == "sqlite"):
+            return
+
+        settings = self._read_settings()
+        if not isinstance(settings, dict):
+            settings = {"profiles": {}, "launchOptions": []}
+        if name == "sqlite":
+            # Migrates the JSON settings, including journaled patches
+            settings_store = SettingsStore()
+            try:
+                settings = {**settings, "generation": settings_store.write_settings(settings)}
+            except BaseException:
+                settings_store.close()
+                for suffix in ("", "-wal", "-shm", ".generation"):
+                    Path(f"{SETTINGS_DB_PATH}{suffix}").unlink(missing_ok=True)
+                raise
+            self._settings_store = settings_store
+            Path(SETTINGS_JOURNAL_PATH).unlink(missing_ok=True)
+        else:
+            settings = self._write_settings_snapshot(settings)
+            Path(SETTINGS_JOURNAL_PATH).unlink(missing_ok=True)
+            settings_store.close()
+            self._settings_store = None
+            for suffix in ("", "-wal", "-shm", ".generation"):
+                Path(f"{SETTINGS_DB_PATH}{suffix}").unlink(missing_ok=True)
+
+        self._cache_written_settings(settings)
+        self._compile_launch_plans(settings)
+
+    async def set_settings_store(self, name):
+        """Store the settings as "json" (settings.json) or "sqlite" (settings.db)."""
+        try:
+            await self._run_write(self._set_settings_store, name)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError, sqlite3.Error) as e:
+            log(f"Failed to change settings store to {name}: {e}")
+            raise
+
+    async def get_settings_store(self):
+        return "sqlite" if os.path.exists(SETTINGS_DB_PATH) else "json"
+
+    def _export_settings(self, path):
+        settings = self._read_settings()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=4)
+        os.replace(tmp_path, path)
+        return path
+
+    async def export_settings(self, path=None):
+        """Export the settings as a JSON document, whatever store they live in."""
+        try:
+            return await self._run_write(self._export_settings, path or SETTINGS_EXPORT_PATH)
+        except (OSError, IOError, TypeError, ValueError, sqlite3.Error) as e:
+            log(f"Failed to export settings: {e}")
+            return None
+
+    async def compile_launch_plans(self):
+        try:
+            await self._run_write(self._compile_current_launch_plans)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to compile launch plans: {e}")
+
+    def _preview_launch_commands(self, appids, command):
+        settings = self._read_settings()
+        key = self._get_settings_model_key(settings)
+        base_args = split_launch_option(command)
+        if (
+            not isinstance(settings, dict)
+            or not isinstance(settings.get("profiles"), dict)
+            or not isinstance(settings.get("launchOptions"), list)
+        ):
+            # run.py launches the command untouched without valid settings
+            return {str(appid): {"args": base_args, "env_vars": {}} for appid in appids or []}
+
+        if appids is None:
+            appids = list(settings["profiles"].keys())
+
+        return resolve_launch_commands(settings, appids, base_args, key)
+
+    async def preview_launch_commands(self, appids=None, command="%command%"):
+        try:
+            return await asyncio.to_thread(self._preview_launch_commands, appids, command)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to preview launch commands: {e}")
+            return {}
 
     def _get_backup_folder_path(self, appid):
+        # Backups used to be stored as one .txt file each in this folder
         appid = str(appid)
         if not appid.isdigit():
             raise ValueError(f"Invalid Steam app id: {appid}")
 
         return Path(BACKUPS_PATH) / appid
 
+    def _get_backup_index_path(self, appid):
+        return Path(BACKUPS_PATH) / f"{self._get_backup_folder_path(appid).name}.index.json"
+
+    def _get_backup_object_path(self, digest, compressed):
+        if not re.fullmatch(r"[0-9a-f]{64}", str(digest)):
+            raise ValueError(f"Invalid backup hash: {digest}")
+
+        return Path(BACKUP_OBJECTS_PATH) / (f"{digest}.gz" if compressed else digest)
+
+    def _write_backup_object(self, command, policy):
+        """Store a command by content hash, once for all the backups of every app."""
+        data = command.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if self._get_backup_object_path(digest, True).exists() or self._get_backup_object_path(digest, False).exists():
+            return digest
+
+        compress_above = policy.get("compressAbove")
+        compressed = compress_above is not None and len(data) > compress_above
+        object_path = self._get_backup_object_path(digest, compressed)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = object_path.with_name(f"{object_path.name}.tmp")
+        tmp_path.write_bytes(gzip.compress(data) if compressed else data)
+        os.replace(tmp_path, object_path)
+        return digest
+
+    def _read_backup_object(self, digest):
+        try:
+            return gzip.decompress(self._get_backup_object_path(digest, True).read_bytes()).decode('utf-8')
+        except FileNotFoundError:
+            return self._get_backup_object_path(digest, False).read_text(encoding='utf-8')
+
+    def _get_backup_entry(self, backup_id, date, command, digest):
+        return {
+            "id": backup_id,
+            "date": date,
+            "size": len(command.encode('utf-8')),
+            "preview": command[:BACKUP_PREVIEW_LENGTH],
+            "hash": digest,
+        }
+
+    def _load_backup_index(self, appid):
+        """Return the backups of an app, most recent first, without their commands."""
+        index = self._read_json(self._get_backup_index_path(appid))
+        backups = index.get("backups") if isinstance(index, dict) else None
+        if not isinstance(backups, list):
+            return []
+        return [backup for backup in backups if isinstance(backup, dict) and backup.get("hash")]
+
+    def _save_backup_index(self, appid, backups):
+        index_path = self._get_backup_index_path(appid)
+        if not backups:
+            index_path.unlink(missing_ok=True)
+            return
+
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_name(f"{index_path.name}.tmp")
+        tmp_path.write_text(json.dumps({"backups": backups}), encoding='utf-8')
+        os.replace(tmp_path, index_path)
+
+    def _get_backup_policy(self):
+        policy = self._read_json(BACKUP_POLICY_PATH)
+        policy = policy if isinstance(policy, dict) else {}
+        return {key: policy.get(key, value) for key, value in DEFAULT_BACKUP_POLICY.items()}
+
+    def _set_backup_policy(self, policy):
+        if not isinstance(policy, dict):
+            raise ValueError(f"Invalid backup policy: {policy}")
+
+        policy = {**self._get_backup_policy(), **policy}
+        for key in DEFAULT_BACKUP_POLICY:
+            value = policy[key]
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                raise ValueError(f"Invalid backup policy {key}: {value}")
+        if policy["keepLast"] == 0:
+            raise ValueError("Invalid backup policy keepLast: 0, the most recent backup is always kept")
+
+        Path(BACKUPS_PATH).mkdir(parents=True, exist_ok=True)
+        self._write_json(BACKUP_POLICY_PATH, {key: policy[key] for key in DEFAULT_BACKUP_POLICY})
+
+    def _apply_backup_retention(self, backups, policy):
+        """
+        Drop the backups beyond the keepLast most recent ones or older than
+        maxAgeDays. The most recent backup of an app is always kept.
+        """
+        kept = backups[:1]
+        max_age_days = policy.get("maxAgeDays")
+        oldest = datetime.now().astimezone() - timedelta(days=max_age_days) if max_age_days is not None else None
+        keep_last = policy.get("keepLast")
+        for backup in backups[1:]:
+            if keep_last is not None and len(kept) >= keep_last:
+                break
+            if oldest is not None and self._parse_backup_date(backup["date"]) < oldest:
+                continue
+            kept.append(backup)
+        return kept
+
+    def _parse_backup_date(self, date):
+        # Legacy backups are named after naive local times
+        parsed = datetime.fromisoformat(date)
+        return parsed if parsed.tzinfo is not None else parsed.astimezone()
+
+    def _migrate_legacy_backups(self):
+        """
+        Move backups stored as one timestamped .txt file each into the
+        content-addressed store. Every backup is migrated, the retention
+        policy only applies once the backups are in the store.
+        """
+        backups_path = Path(BACKUPS_PATH)
+        if not backups_path.exists():
+            return
+
+        policy = self._get_backup_policy()
+        for backup_folder_path in backups_path.iterdir():
+            if not backup_folder_path.is_dir() or not backup_folder_path.name.isdigit():
+                continue
+
+            appid = backup_folder_path.name
+            backups = self._load_backup_index(appid)
+            migrated_paths = []
+            for backup_path in backup_folder_path.glob("*.txt"):
+                try:
+                    command = backup_path.read_text(encoding='utf-8')
+                    date = self._parse_backup_date(backup_path.stem).isoformat()
+                except (OSError, IOError, ValueError):
+                    # Left in place rather than lost
+                    continue
+                digest = self._write_backup_object(command, policy)
+                backups.append(self._get_backup_entry(backup_path.name, date, command, digest))
+                migrated_paths.append(backup_path)
+
+            # Identical commands are kept once, with their most recent date
+            backups.sort(key=lambda backup: backup["date"], reverse=True)
+            hashes = set()
+            backups = [
+                backup for backup in backups
+                if backup["hash"] not in hashes and not hashes.add(backup["hash"])
+            ]
+            self._save_backup_index(appid, backups)
+
+            for backup_path in migrated_paths:
+                backup_path.unlink(missing_ok=True)
+            try:
+                backup_folder_path.rmdir()
+            except OSError:
+                pass
+
+    def _compact_backups(self):
+        """
+        Apply the retention policy to every app and delete the stored commands
+        no backup refers to anymore. Returns what was removed.
+        """
+        self._migrate_legacy_backups()
+        policy = self._get_backup_policy()
+        removed_backups = 0
+        hashes = set()
+        for index_path in Path(BACKUPS_PATH).glob("*.index.json"):
+            appid = index_path.name.split(".", 1)[0]
+            if not appid.isdigit():
+                continue
+            backups = self._load_backup_index(appid)
+            kept = self._apply_backup_retention(backups, policy)
+            if len(kept) != len(backups):
+                removed_backups += len(backups) - len(kept)
+                self._save_backup_index(appid, kept)
+            hashes.update(backup["hash"] for backup in kept)
+
+        removed_objects = 0
+        freed_bytes = 0
+        objects_path = Path(BACKUP_OBJECTS_PATH)
+        if objects_path.exists():
+            for object_path in objects_path.iterdir():
+                # Temporary files are left behind by interrupted writes
+                if object_path.name.split(".", 1)[0] in hashes and not object_path.name.endswith(".tmp"):
+                    continue
+                freed_bytes += object_path.stat().st_size
+                object_path.unlink()
+                removed_objects += 1
+
+        return {"removed_backups": removed_backups, "removed_objects": removed_objects, "freed_bytes": freed_bytes}
+
+    async def compact_backups(self):
+        try:
+            result = await self._run_write(self._compact_backups)
+            if result["removed_backups"] or result["removed_objects"]:
+                log(f"Compacted backups: {result}")
+            return result
+        except (OSError, IOError, TypeError, ValueError, KeyError) as e:
+            log(f"Failed to compact backups: {e}")
+            return None
+
+    async def _compact_backups_periodically(self):
+        while True:
+            await self.compact_backups()
+            await asyncio.sleep(BACKUP_COMPACTION_INTERVAL)
+
+    async def get_backup_policy(self):
+        try:
+            return await asyncio.to_thread(self._get_backup_policy)
+        except (OSError, IOError) as e:
+            log(f"Failed to get backup policy: {e}")
+            return dict(DEFAULT_BACKUP_POLICY)
+
+    async def set_backup_policy(self, policy):
+        try:
+            await self._run_write(self._set_backup_policy, policy)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to set backup policy: {e}")
+            raise
+
     def _is_dlo_launch_options_command(self, command):
         return (
             COMMAND in command
@@ -176,50 +1452,48 @@ class Plugin:
         if self._is_dlo_launch_options_command(command):
             return False
 
-        backup_folder_path = self._get_backup_folder_path(appid)
-        if not backup_folder_path.exists():
-            return True
-
+        # Validates the app id
+        self._get_backup_folder_path(appid)
         return True
 
-    def _backup_original_launch_options(self, appid, command):
+    def _backup_original_launch_options(self, appid, command, policy=None):
         if not self._should_backup_original_launch_options(appid, command):
             return
 
-        backup_folder_path = self._get_backup_folder_path(appid)
-        backup_folder_path.mkdir(parents=True, exist_ok=True)
+        policy = policy or self._get_backup_policy()
+        backups = self._load_backup_index(appid)
+        digest = self._write_backup_object(command, policy)
+        if backups and backups[0]["hash"] == digest:
+            # Already the most recent backup of this app
+            return
 
         timestamp = datetime.now().astimezone().isoformat(timespec='microseconds')
-        backup_path = backup_folder_path / f"{timestamp}.txt"
-        backup_path.write_text(command, encoding='utf-8')
+        backups = [self._get_backup_entry(f"{timestamp}.txt", timestamp, command, digest)] + [
+            backup for backup in backups if backup["hash"] != digest
+        ]
+        self._save_backup_index(appid, self._apply_backup_retention(backups, policy))
 
     def _backup_original_launch_options_with_existing(self, appid, command):
         self._backup_existing_original_launch_options()
         self._backup_original_launch_options(appid, command)
 
-    def _get_original_launch_options_backups(self, appid):
-        backup_folder_path = self._get_backup_folder_path(appid)
-        if not backup_folder_path.exists():
-            return []
+    def _get_original_launch_options_backups(self, appid, offset, limit):
+        backups = self._load_backup_index(appid)
+        return backups[offset:offset + limit] if limit is not None else backups[offset:]
 
-        backups = []
-        for backup_path in backup_folder_path.glob("*.txt"):
-            try:
-                timestamp = datetime.fromisoformat(backup_path.stem)
-                backups.append({
-                    "id": backup_path.name,
-                    "date": timestamp.isoformat(),
-                    "command": backup_path.read_text(encoding='utf-8'),
-                })
-            except (OSError, IOError, ValueError):
-                continue
+    def _get_original_launch_options_backup(self, appid, backup_id):
+        backup = next((backup for backup in self._load_backup_index(appid) if backup["id"] == backup_id), None)
+        if backup is None:
+            return None
 
-        backups.sort(key=lambda backup: backup["date"], reverse=True)
-        return backups
+        try:
+            return {**backup, "command": self._read_backup_object(backup["hash"])}
+        except FileNotFoundError:
+            return None
 
     async def backup_original_launch_options(self, appid, command):
         try:
-            await asyncio.to_thread(
+            await self._run_write(
                 self._backup_original_launch_options_with_existing,
                 appid,
                 command,
@@ -227,31 +1501,41 @@ class Plugin:
         except (OSError, IOError, TypeError, ValueError) as e:
             log(f"Failed to backup original launch options for {appid}: {e}")
 
-    async def get_original_launch_options_backups(self, appid):
+    async def get_original_launch_options_backups(self, appid, offset=0, limit=None):
         try:
             return await asyncio.to_thread(
                 self._get_original_launch_options_backups,
                 appid,
+                offset,
+                limit,
             )
         except (OSError, IOError, TypeError, ValueError) as e:
             log(f"Failed to get original launch options backups for {appid}: {e}")
             return []
 
+    async def get_original_launch_options_backup(self, appid, backup_id):
+        try:
+            return await asyncio.to_thread(
+                self._get_original_launch_options_backup,
+                appid,
+                backup_id,
+            )
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to get original launch options backup {backup_id} for {appid}: {e}")
+            return None
+
     def _delete_original_launch_options_backup(self, appid, backup_id):
-        backup_folder_path = self._get_backup_folder_path(appid)
-        backup_path = backup_folder_path / str(backup_id)
-        if (
-            backup_path.parent != backup_folder_path
-            or backup_path.suffix != ".txt"
-            or not backup_path.exists()
-        ):
+        backups = self._load_backup_index(appid)
+        remaining = [backup for backup in backups if backup["id"] != backup_id]
+        if len(remaining) == len(backups):
             return
 
-        backup_path.unlink()
+        # The stored command is deleted by the next compaction if nothing else refers to it
+        self._save_backup_index(appid, remaining)
 
     async def delete_original_launch_options_backup(self, appid, backup_id):
         try:
-            await asyncio.to_thread(
+            await self._run_write(
                 self._delete_original_launch_options_backup,
                 appid,
                 backup_id,
@@ -260,36 +1544,165 @@ class Plugin:
             log(f"Failed to delete original launch options backup for {appid}: {e}")
 
     def _delete_original_launch_options_backups(self, appid):
-        backup_folder_path = self._get_backup_folder_path(appid)
-        if not backup_folder_path.exists():
-            return
-
-        for backup_path in backup_folder_path.glob("*.txt"):
-            try:
-                backup_path.unlink()
-            except (OSError, IOError):
-                continue
+        self._save_backup_index(appid, [])
 
     async def delete_original_launch_options_backups(self, appid):
         try:
-            await asyncio.to_thread(
+            await self._run_write(
                 self._delete_original_launch_options_backups,
                 appid,
             )
         except (OSError, IOError, TypeError, ValueError) as e:
             log(f"Failed to delete original launch options backups for {appid}: {e}")
 
+    def _get_bulk_item_appid(self, item):
+        # Items are not validated yet, a malformed one must still get a result
+        return str(item[0]) if isinstance(item, (list, tuple)) and item else str(item)
+
+    def _backup_original_launch_options_for_apps(self, items):
+        self._backup_existing_original_launch_options()
+        policy = self._get_backup_policy()
+        results = []
+        for item in items:
+            try:
+                appid, command = item
+                self._backup_original_launch_options(appid, command, policy)
+                results.append({"appid": str(appid), "ok": True})
+            except (OSError, IOError, TypeError, ValueError) as e:
+                results.append({"appid": self._get_bulk_item_appid(item), "ok": False, "error": str(e)})
+        return results
+
+    def _get_original_launch_options_backups_for_apps(self, appids, limit):
+        backups = {}
+        for appid in appids:
+            try:
+                backups[str(appid)] = self._get_original_launch_options_backups(appid, 0, limit)
+            except (OSError, IOError, TypeError, ValueError):
+                backups[str(appid)] = []
+        return backups
+
+    def _restore_original_launch_options_for_apps(self, items):
+        """
+        Set the original launch options of each app back to one of its
+        backups, the most recent one unless a backup id is given, with a
+        single settings patch.
+        """
+        results = []
+        ops = []
+        for item in items:
+            try:
+                appid, backup_id = (item, None) if isinstance(item, (str, int)) else item
+                backups = self._load_backup_index(appid)
+                if backup_id is not None:
+                    backups = [backup for backup in backups if backup["id"] == backup_id]
+                if not backups:
+                    results.append({"appid": str(appid), "ok": False, "error": "No backup"})
+                    continue
+                command = self._read_backup_object(backups[0]["hash"])
+            except (OSError, IOError, TypeError, ValueError) as e:
+                results.append({"appid": self._get_bulk_item_appid(item), "ok": False, "error": str(e)})
+                continue
+            ops.append({"op": "set_profile_field", "appid": str(appid), "field": "originalLaunchOptions", "value": command})
+            results.append({"appid": str(appid), "ok": True, "backupId": backups[0]["id"], "command": command})
+
+        if ops:
+            self._patch_settings(ops)
+        return results
+
+    def _delete_original_launch_options_backups_for_apps(self, appids):
+        results = []
+        for appid in appids:
+            try:
+                self._delete_original_launch_options_backups(appid)
+                results.append({"appid": str(appid), "ok": True})
+            except (OSError, IOError, TypeError, ValueError) as e:
+                results.append({"appid": str(appid), "ok": False, "error": str(e)})
+        return results
+
+    async def backup_original_launch_options_for_apps(self, items):
+        """Back up the original launch options of many apps, given as (appid, command) pairs."""
+        try:
+            return await self._run_write(self._backup_original_launch_options_for_apps, items)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to backup original launch options: {e}")
+            return [
+                {"appid": self._get_bulk_item_appid(item), "ok": False, "error": str(e)}
+                for item in (items if isinstance(items, (list, tuple)) else [])
+            ]
+
+    async def get_original_launch_options_backups_for_apps(self, appids, limit=None):
+        try:
+            return await asyncio.to_thread(self._get_original_launch_options_backups_for_apps, appids, limit)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to get original launch options backups: {e}")
+            return {}
+
+    async def restore_original_launch_options_for_apps(self, items):
+        """Restore backups given as appids, for their latest backup, or (appid, backup id) pairs."""
+        try:
+            return await self._run_write(self._restore_original_launch_options_for_apps, items)
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to restore original launch options: {e}")
+            raise
+
+    async def delete_original_launch_options_backups_for_apps(self, appids):
+        try:
+            return await self._run_write(self._delete_original_launch_options_backups_for_apps, appids)
+        except (OSError, IOError, TypeError, ValueError) as e:
+            log(f"Failed to delete original launch options backups: {e}")
+            return [{"appid": str(appid), "ok": False, "error": str(e)} for appid in appids]
+
+    def _import_localconfig_launch_options(self):
+        """
+        Back up the launch options Steam has for every app, in one pass over
+        localconfig.vdf, and keep them as the original launch options of
+        the apps that already have a profile without any. Other apps only
+        get the backup, so no profile is created for them.
+        """
+        launch_options = read_launch_options(self._get_localconfig_vdf_path())
+
+        self._backup_existing_original_launch_options()
+        policy = self._get_backup_policy()
+        settings = self._read_settings()
+        profiles = settings.get("profiles") if isinstance(settings, dict) else None
+        profiles = profiles if isinstance(profiles, dict) else {}
+        backed_up = 0
+        ops = []
+        for appid, command in launch_options.items():
+            if not self._should_backup_original_launch_options(appid, command):
+                continue
+
+            self._backup_original_launch_options(appid, command, policy)
+            backed_up += 1
+            profile = profiles.get(appid)
+            if isinstance(profile, dict) and not profile.get("originalLaunchOptions"):
+                ops.append({"op": "set_profile_field", "appid": appid, "field": "originalLaunchOptions", "value": command})
+
+        if ops:
+            self._patch_settings(ops)
+        return {"found": len(launch_options), "backed_up": backed_up, "imported": len(ops)}
+
+    async def import_localconfig_launch_options(self):
+        try:
+            result = await self._run_write(self._import_localconfig_launch_options)
+            log(f"Imported launch options from localconfig.vdf: {result}")
+            return result
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError) as e:
+            log(f"Failed to import launch options from localconfig.vdf: {e}")
+            return None
+
     def _backup_existing_original_launch_options(self):
         backups_path = Path(BACKUPS_PATH)
         if backups_path.exists():
             return
 
         backups_path.mkdir(parents=True, exist_ok=True)
-        settings = self._read_json(SETTINGS_PATH)
+        settings = self._read_settings()
         profiles = settings.get("profiles") if isinstance(settings, dict) else None
         if not isinstance(profiles, dict):
             return
 
+        policy = self._get_backup_policy()
         for appid, profile in profiles.items():
             if not str(appid).isdigit():
                 continue
@@ -301,23 +1714,183 @@ class Plugin:
             if not original_launch_options:
                 continue
 
-            self._backup_original_launch_options(appid, original_launch_options)
+            self._backup_original_launch_options(appid, original_launch_options, policy)
 
     async def backup_existing_original_launch_options(self):
         try:
-            await asyncio.to_thread(self._backup_existing_original_launch_options)
+            await self._run_write(self._backup_existing_original_launch_options)
         except (OSError, IOError, TypeError, ValueError) as e:
             log(f"Failed to backup existing original launch options: {e}")
 
+    def _get_watched_paths(self):
+        paths = {
+            SETTINGS_PATH: "settings_changed",
+            SETTINGS_JOURNAL_PATH: "settings_changed",
+            SETTINGS_DB_PATH: "settings_changed",
+            f"{SETTINGS_DB_PATH}-wal": "settings_changed",
+            get_launch_journal_head_path(): "launch_recorded",
+        }
+        try:
+            paths[str(self._get_steam_path() / "userdata")] = "steam_users_changed"
+            for user in self._get_steam_users():
+                paths[str(user["path"] / "config" / "localconfig.vdf")] = "localconfig_changed"
+        except (OSError, IOError) as e:
+            log(f"Not watching Steam's userdata: {e}")
+        return paths
+
+    def _is_own_settings_change(self):
+        if self._written_settings_key is None:
+            return False
+        return self._get_settings_files_key() == self._written_settings_key
+
+    async def _emit_file_changes(self, events):
+        if "settings_changed" in events:
+            # Checked after the writes in progress. The frontend already has
+            # the settings it asked the plugin to write.
+            try:
+                is_own_change = await self.loop.run_in_executor(
+                    self._get_write_executor(),
+                    self._is_own_settings_change,
+                )
+            except (OSError, sqlite3.Error):
+                is_own_change = False
+            if is_own_change:
+                events = events - {"settings_changed"}
+            else:
+                # Keeps the patches journaled before a hand edit of settings.json
+                await self.compact_settings_journal()
+        for event in sorted(events):
+            await decky.emit(event)
+
+    def _on_file_changes(self, events):
+        steam_events = events & {"steam_users_changed", "localconfig_changed"}
+        if steam_events:
+            # Only cached by the plugin, the frontend reads none of it
+            self._steam_users_cache = None
+            self._managed_appids_cache = None
+            if "steam_users_changed" in steam_events:
+                # Watches the localconfig.vdf of the users added since
+                self._start_file_watcher()
+            events = events - steam_events
+        if events:
+            self.loop.create_task(self._emit_file_changes(events))
+
+    def _start_file_watcher(self):
+        self._stop_file_watcher()
+        self._file_watcher = FileWatcher(self._get_watched_paths(), self._on_file_changes)
+        self._file_watcher.start()
+
+    def _stop_file_watcher(self):
+        if self._file_watcher is not None:
+            self._file_watcher.stop()
+            self._file_watcher = None
+
+    def _resolve_launch(self, request):
+        """
+        Resolve the final args and env vars of a launch for run.py, from the
+        settings model kept in memory. Prefixes are looked up in the PATH and
+        working directory of the launch, not the plugin's.
+        """
+        appid = request.get("appid")
+        args = request.get("args")
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError(f"Invalid launch args: {args}")
+
+        settings = self._read_settings()
+        if not settings or "profiles" not in settings or "launchOptions" not in settings:
+            return {"args": args, "env_vars": {}}
+
+        model = get_settings_model(settings, self._get_settings_model_key(settings))
+        plan = resolve_launch_plan(settings, appid, model)
+
+        # Like run.py, prefixes are looked up after the env vars are applied
+        search_path = plan["env_vars"].get("PATH", request.get("path") or os.defpath)
+        cwd = request.get("cwd") or "/"
+        if self._resolver_executable_cache is None:
+            self._resolver_executable_cache = {}
+        executable_resolver = ExecutableResolver(self._resolver_executable_cache, search_path)
+
+        def is_available(executable):
+            if "/" not in executable and executable_resolver.which(executable):
+                return True
+            return os.path.isfile(os.path.join(cwd, executable))
+
+        final_args = build_final_args(plan, args, is_available)
+        executable_resolver.store()
+        return {"args": final_args, "env_vars": plan["env_vars"]}
+
+    async def _handle_resolver_connection(self, reader, writer):
+        try:
+            request = json.loads(await asyncio.wait_for(reader.readline(), RESOLVER_REQUEST_TIMEOUT))
+            if not isinstance(request, dict):
+                raise ValueError(f"Invalid resolver request: {request}")
+            response = await asyncio.to_thread(self._resolve_launch, request)
+            writer.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b"\n")
+            await writer.drain()
+        except (OSError, IOError, TypeError, ValueError, KeyError, AttributeError, asyncio.TimeoutError) as e:
+            # Closing without a response makes run.py resolve the launch itself
+            log(f"Failed to resolve launch: {e}")
+        finally:
+            writer.close()
+
+    async def _start_resolver(self):
+        await self._stop_resolver()
+        # The socket is created with the permissions of the umask, other
+        # users are kept out by its folder until it is restricted too
+        Path(RESOLVER_FOLDER_PATH).mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(RESOLVER_FOLDER_PATH, 0o700)
+        # Left behind when the plugin was not unloaded cleanly
+        Path(RESOLVER_SOCKET_PATH).unlink(missing_ok=True)
+        self._resolver_server = await asyncio.start_unix_server(
+            self._handle_resolver_connection,
+            path=RESOLVER_SOCKET_PATH,
+        )
+        os.chmod(RESOLVER_SOCKET_PATH, 0o600)
+
+    async def _stop_resolver(self):
+        if self._resolver_server is None:
+            return
+        self._resolver_server.close()
+        await self._resolver_server.wait_closed()
+        self._resolver_server = None
+        Path(RESOLVER_SOCKET_PATH).unlink(missing_ok=True)
+
     async def cleanup(self):
-        pass
+        await self._stop_resolver()
+        self._stop_file_watcher()
+        await self.compact_settings_journal()
 
     async def _main(self):
         self.loop = asyncio.get_event_loop()
         await self.prepare()
+        self._backup_compaction_task = asyncio.create_task(self._compact_backups_periodically())
+        try:
+            self._start_file_watcher()
+        except OSError as e:
+            log(f"Failed to start file watcher: {e}")
+        try:
+            await self._start_resolver()
+        except OSError as e:
+            log(f"Failed to start launch resolver: {e}")
 
     async def _unload(self):
+        if self._settings_gc_handle is not None:
+            self._settings_gc_handle.cancel()
+            self._settings_gc_handle = None
+        if self._settings_journal_handle is not None:
+            self._settings_journal_handle.cancel()
+            self._settings_journal_handle = None
+        if self._backup_compaction_task is not None:
+            self._backup_compaction_task.cancel()
+            self._backup_compaction_task = None
+        await self.flush_writes()
         await self.cleanup()
+        if self._write_executor is not None:
+            self._write_executor.shutdown(wait=True)
+            self._write_executor = None
+        if self._settings_store is not None:
+            self._settings_store.close()
+            self._settings_store = None
 
     async def _uninstall(self):
         try:
@@ -1,13 +1,25 @@
-import datetime
+# Imported on every launch. Modules only some launches need, like shutil, re
+# or socket, are imported where they are used.
+import heapq
 import json
 import os
-import shutil
 import sys
-from pathlib import Path
+import time
+import zlib
+
+from shared import (
+    DEFAULT_PLAN_PATH,
+    EXECUTABLE_CACHE_PATH,
+    GENERATION_PATH,
+    LAUNCH_JOURNAL_PATH,
+    PLANS_PATH,
+    RESOLVER_SOCKET_PATH,
+    SETTINGS_DB_GENERATION_PATH,
+    SETTINGS_DB_PATH,
+    SETTINGS_JOURNAL_PATH,
+    SETTINGS_PATH,
+)
 
-from shared import SETTINGS_FOLDER_PATH, SETTINGS_PATH
-
-LOG_FILE = os.path.join(SETTINGS_FOLDER_PATH, 'debug.log')
 DEFAULT_ENV_VARIABLE_MERGES = [
     {"name": "WINEDLLOVERRIDES", "delimiter": ";"},
     {"name": "MANGOHUD_CONFIG", "delimiter": ","},
@@ -16,33 +28,202 @@ DEFAULT_ENV_VARIABLE_MERGES = [
     {"name": "DXVK_HUD", "delimiter": ","},
     {"name": "RADV_PERFTEST", "delimiter": ","},
 ]
+MAX_EXECUTABLE_CACHE_PATHS = 8
+# Every launch record takes exactly this many bytes in its launch journal slot
+LAUNCH_RECORD_SIZE = 4096
+# Slots of the launch journal, the launches it keeps
+MAX_LAUNCH_RECORDS = 100
+# Digits reserved for the "journal" stage of a launch record, filled in once
+# the record is written
+JOURNAL_TIMING_WIDTH = 10
+# Seconds the plugin's resolver has to answer before the launch is resolved here
+RESOLVER_TIMEOUT = 0.05
 
 executable = sys.argv[1] if len(sys.argv) > 1 else None
 args = sys.argv[1:]
 
 
 def _write_json(file_path, data):
-    path = Path(file_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-    with open(path, 'w', encoding='utf-8') as f:
+    with open(file_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4)
 
 
 def _read_json(file_path):
-    path = Path(file_path)
-    if not path.exists():
-        return None
-
     try:
-        with open(path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
+    except (json.JSONDecodeError, FileNotFoundError, NotADirectoryError):
         return None
 
 
 def get_settings():
-    return _read_json(SETTINGS_PATH)
+    """
+    Read the settings from the SQLite store when it is enabled, otherwise from
+    the settings file with the patches journaled on top of it applied.
+    """
+    if os.path.exists(SETTINGS_DB_PATH):
+        settings = _read_settings_store(lambda store: store.read_settings())
+        if settings is not None:
+            return settings
+
+    settings, signature = read_settings_snapshot()
+    ops = read_settings_journal(get_settings_generation(settings), signature)
+    if ops:
+        if not isinstance(settings, dict):
+            settings = {}
+        settings.setdefault("profiles", {})
+        settings.setdefault("launchOptions", [])
+        apply_settings_patch(settings, ops)
+    return settings
+
+
+def get_app_settings(appid):
+    """
+    Read the settings needed to launch one app.
+
+    With the SQLite store only the profile of that app is read, otherwise the
+    whole settings are.
+    """
+    if not os.path.exists(SETTINGS_DB_PATH):
+        return get_settings()
+
+    settings = _read_settings_store(lambda store: store.read_app_settings(appid))
+    return settings if settings is not None else get_settings()
+
+
+def _read_settings_store(read):
+    """
+    Read the SQLite store with read(store), or return None when it is gone.
+
+    The store is opened read-only: one removed by the plugin switching back
+    to the JSON settings is never recreated empty by a launch.
+    """
+    import sqlite3
+    from settings_store import SettingsStore
+    store = SettingsStore(read_only=True)
+    try:
+        return read(store)
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        store.close()
+
+
+def get_settings_generation(settings):
+    """
+    Return the generation of a settings snapshot.
+
+    The plugin stamps every settings file it writes with a generation one
+    higher than the previous one. Files without one (e.g. written by hand)
+    are generation 0.
+    """
+    generation = settings.get("generation") if isinstance(settings, dict) else None
+    return generation if isinstance(generation, int) else 0
+
+
+def read_settings_snapshot():
+    """Read the settings file along with the signature of that very file."""
+    try:
+        with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
+            signature = _get_file_signature(os.fstat(f.fileno()))
+            return json.load(f), signature
+    except (json.JSONDecodeError, FileNotFoundError, NotADirectoryError):
+        return None, get_settings_signature()
+
+
+def read_settings_journal(generation, signature, any_file=False):
+    """
+    Read the patch operations journaled on top of the settings file.
+
+    Every journal entry records the generation and the file signature of the
+    settings snapshot it was written against, so entries left behind by a
+    snapshot that has been replaced since (e.g. compacted, fully rewritten or
+    edited by hand) are skipped. any_file keeps the entries of every file
+    with that generation, which the plugin replays on top of a file edited
+    by hand.
+    """
+    ops = []
+    try:
+        with open(SETTINGS_JOURNAL_PATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A write torn by a crash
+                    continue
+                if isinstance(entry, dict) and entry.get("settings") == generation and (
+                    any_file or entry.get("file") == signature
+                ):
+                    ops.extend(entry.get("ops") or [])
+    except FileNotFoundError:
+        pass
+    return ops
+
+
+def apply_settings_patch(settings, ops):
+    """
+    Apply field-level patch operations to settings in place.
+
+    Every operation sets a value rather than changing it relative to the
+    current one, so replaying a journal over settings that already contain
+    part of it gives the same result. Profiles are replaced rather than
+    modified, so shallow copies of the profiles and launch options are enough
+    to keep the original settings intact. Returns the app ids whose launch
+    plans are affected, or None when launch options changed and every plan
+    is. Raises ValueError on an invalid operation.
+    """
+    profiles = settings["profiles"]
+    launch_options = settings["launchOptions"]
+    appids = set()
+    all_plans = False
+    for op in ops:
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind in ("set_profile_state", "set_profile_field"):
+            appid = str(op.get("appid"))
+            profile = profiles.get(appid)
+            if not isinstance(profile, dict):
+                profile = {"state": {}, "originalLaunchOptions": ""}
+            profile = profiles[appid] = {**profile, "state": dict(profile.get("state") or {})}
+            if kind == "set_profile_state":
+                target, key = profile["state"], op.get("id")
+            else:
+                target, key = profile, op.get("field")
+                if key not in ("originalLaunchOptions", "disableAutoManageLaunchOptions"):
+                    raise ValueError(f"Invalid profile field: {key}")
+            if not isinstance(key, str):
+                raise ValueError(f"Invalid patch operation: {op}")
+            if op.get("value") is None:
+                target.pop(key, None)
+            else:
+                target[key] = op["value"]
+            appids.add(appid)
+        elif kind == "upsert_launch_option":
+            launch_option = op.get("option")
+            if not isinstance(launch_option, dict) or not launch_option.get("id"):
+                raise ValueError(f"Invalid launch option: {launch_option}")
+            index = next(
+                (i for i, item in enumerate(launch_options) if item.get("id") == launch_option["id"]),
+                None,
+            )
+            if index is None:
+                # New launch options are listed first, like in the UI
+                launch_options.insert(0, launch_option)
+            else:
+                launch_options[index] = launch_option
+            all_plans = True
+        elif kind == "delete_launch_option":
+            launch_option_id = op.get("id")
+            launch_options[:] = [item for item in launch_options if item.get("id") != launch_option_id]
+            for appid, profile in profiles.items():
+                if isinstance(profile, dict) and launch_option_id in (profile.get("state") or {}):
+                    state = {key: value for key, value in profile["state"].items() if key != launch_option_id}
+                    profiles[appid] = {**profile, "state": state}
+            all_plans = True
+        else:
+            raise ValueError(f"Invalid patch operation: {op}")
+    return None if all_plans else appids
 
 
 def get_steam_appid():
@@ -58,6 +239,76 @@ def get_steam_appid():
     return None
 
 
+_token_patterns = None
+
+
+def _get_token_patterns():
+    global _token_patterns
+    if _token_patterns is None:
+        import re
+        _token_patterns = (
+            # Unquoted words when the command has no quotes or escapes
+            re.compile(r"[^ \t\r\n]+"),
+            # Word chunks, quoted strings, escapes and whitespace. Anything
+            # else is an unterminated quote or a trailing backslash.
+            re.compile(r"""([^ \t\r\n'"\\]+)|'([^']*)'|"((?:[^"\\]|\\.)*)"|\\(.)|([ \t\r\n]+)|(.)""", re.DOTALL),
+            re.compile(r'\\(["\\])'),
+        )
+    return _token_patterns
+
+
+def split_launch_option(raw_command):
+    """
+    Split a launch option string into tokens in a single pass.
+
+    Quoting follows shlex.split: single quotes are literal, double quotes only
+    unescape \" and \\, and a backslash outside quotes escapes any character.
+    Raises ValueError on an unterminated quote or a trailing backslash.
+    """
+    word_pattern, chunk_pattern, double_quote_escape_pattern = _get_token_patterns()
+    if "'" not in raw_command and '"' not in raw_command and '\\' not in raw_command:
+        return word_pattern.findall(raw_command)
+
+    tokens = []
+    chunks = []
+    quoted = False
+    for match in chunk_pattern.finditer(raw_command):
+        word, single_quoted, double_quoted, escaped, whitespace, invalid = match.groups()
+        if word is not None:
+            chunks.append(word)
+        elif single_quoted is not None:
+            chunks.append(single_quoted)
+            quoted = True
+        elif double_quoted is not None:
+            chunks.append(double_quote_escape_pattern.sub(r"\1", double_quoted))
+            quoted = True
+        elif escaped is not None:
+            chunks.append(escaped)
+        elif whitespace is not None:
+            if chunks or quoted:
+                tokens.append(''.join(chunks))
+            chunks = []
+            quoted = False
+        elif invalid == '"' and raw_command[match.end():].replace('\\\\', '').endswith('\\'):
+            # Same as shlex: a backslash ending an unterminated double quote
+            raise ValueError("No escaped character")
+        elif invalid == '\\':
+            raise ValueError("No escaped character")
+        else:
+            raise ValueError("No closing quotation")
+
+    if chunks or quoted:
+        tokens.append(''.join(chunks))
+    return tokens
+
+
+def _is_env_var_token(part):
+    # Env vars look like KEY=value where the key is not a flag or a path
+    if '=' not in part or part.startswith('-'):
+        return False
+    return '/' not in part.split('=', 1)[0]
+
+
 def parse_launch_option(raw_command):
     """
     Parse a launch option string into its components.
@@ -71,71 +322,101 @@ def parse_launch_option(raw_command):
     if not raw_command or not raw_command.strip():
         return {'env_vars': {}, 'prefix': [], 'suffix': []}
 
-    import shlex
     try:
-        parts = shlex.split(raw_command)
+        parts = split_launch_option(raw_command)
     except ValueError:
         parts = raw_command.split()
 
-    # Find %command% position
-    try:
-        command_idx = parts.index('%command%')
-        left_parts = parts[:command_idx]
-        right_parts = parts[command_idx + 1:]
-    except ValueError:
-        # No %command% found - need to infer what these parts are
-        # Separate env vars first, then check remaining tokens
-        temp_left = []
-        temp_right = []
-
-        for part in parts:
-            # Check if it's an env var
-            if '=' in part and not part.startswith('-'):
-                key_part = part.split('=', 1)[0]
-                if '/' not in key_part:
-                    # It's an env var, goes to left
-                    temp_left.append(part)
-                    continue
-
-            # Not an env var - check if it looks like a game arg
-            if part.startswith('-') or part.startswith('+'):
-                # Everything from here onwards is a game arg
-                temp_right.append(part)
-                # Add remaining parts to right as well
-                idx = parts.index(part)
-                temp_right.extend(parts[idx + 1:])
-                break
-            else:
-                # Looks like a prefix command
-                temp_left.append(part)
-
-        left_parts = temp_left
-        right_parts = temp_right
-
-    # Separate env vars from prefix in left parts
     env_vars = {}
     prefix = []
-
-    for part in left_parts:
-        if '=' in part and not part.startswith('-'):
-            # Check if it looks like an env var (key part has no /)
-            key_part = part.split('=', 1)[0]
-            if '/' not in key_part:
-                key, value = part.split('=', 1)
-                env_vars[key] = value
-            else:
-                # Looks like a path with =, treat as prefix
-                prefix.append(part)
+    suffix = []
+    # Without %command%, everything from the first game arg onwards is
+    # inferred to be a suffix. Those tokens are held back until we know
+    # whether a %command% follows them.
+    inferred_suffix = None
+    has_command = False
+
+    for part in parts:
+        if has_command:
+            suffix.append(part)
+        elif part == '%command%':
+            has_command = True
+            if inferred_suffix is not None:
+                # The inferred game args were prefix tokens after all
+                for held_part in inferred_suffix:
+                    if _is_env_var_token(held_part):
+                        key, value = held_part.split('=', 1)
+                        env_vars[key] = value
+                    else:
+                        prefix.append(held_part)
+                inferred_suffix = None
+        elif inferred_suffix is not None:
+            inferred_suffix.append(part)
+        elif _is_env_var_token(part):
+            key, value = part.split('=', 1)
+            env_vars[key] = value
+        elif part.startswith('-') or part.startswith('+'):
+            inferred_suffix = [part]
         else:
+            # Looks like a prefix command
             prefix.append(part)
 
+    if inferred_suffix is not None:
+        suffix = inferred_suffix
+
     return {
         'env_vars': env_vars,
         'prefix': prefix,
-        'suffix': right_parts
+        'suffix': suffix
+    }
+
+
+def get_launch_option_hash(raw_command, home=None):
+    """Identify a launch option command together with the home folder its `~` expand to."""
+    home = os.path.expanduser("~") if home is None else home
+    return f"{zlib.crc32((home + chr(0) + raw_command).encode('utf-8')):08x}"
+
+
+def compile_launch_option(raw_command, home=None):
+    """
+    Parse a launch option command into the form stored with its launch
+    option: env var pairs, prefix tokens with `~` expanded and suffix tokens,
+    along with the hash of the command they were parsed from.
+    """
+    home = os.path.expanduser("~") if home is None else home
+    parsed = parse_launch_option(raw_command)
+    return {
+        'hash': get_launch_option_hash(raw_command, home),
+        'env_vars': list(parsed['env_vars'].items()),
+        'prefix': [part.replace("~", home) for part in parsed['prefix']],
+        'suffix': parsed['suffix'],
     }
 
 
+def add_parsed_launch_option(launch_option, home=None):
+    """
+    Return a copy of a launch option holding the parsed form of its on and
+    off commands. Parsed forms that are still current are kept as they are.
+    """
+    if not isinstance(launch_option, dict):
+        return launch_option
+
+    home = os.path.expanduser("~") if home is None else home
+    stored = launch_option.get('parsed')
+    stored = stored if isinstance(stored, dict) else {}
+    parsed = {}
+    for key in ('on', 'off'):
+        raw_command = launch_option.get(key)
+        if not isinstance(raw_command, str) or not raw_command.strip():
+            continue
+        compiled = stored.get(key)
+        if isinstance(compiled, dict) and compiled.get('hash') == get_launch_option_hash(raw_command, home):
+            parsed[key] = compiled
+        else:
+            parsed[key] = compile_launch_option(raw_command, home)
+    return {**launch_option, 'parsed': parsed}
+
+
 def get_env_variable_merge_rules(settings):
     rules = {}
     merge_rules = settings.get("envVariableMerges", DEFAULT_ENV_VARIABLE_MERGES)
@@ -166,108 +447,292 @@ def finalize_env_vars(env_var_values, merge_rules):
     return final_env_vars
 
 
-def get_final_args_details(settings, appid):
-    base_args = sys.argv[1:]
+class SettingsModel:
+    """
+    Indexes of a settings document shared by the resolution of every app.
+
+    The commands each option contributes without any profile state are
+    resolved once, so resolving an app only has to look at the options its
+    profile state actually touches.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.profiles = settings["profiles"]
+        self.options = settings["launchOptions"]
+        self.env_merge_rules = get_env_variable_merge_rules(settings)
+        self.parsed = {}
+        self.home = os.path.expanduser("~")
+
+        # Option indexes by id, and by valueId in array order
+        self.indexes_by_id = {}
+        self.value_id_groups = {}
+        for index, opt in enumerate(self.options):
+            self.indexes_by_id.setdefault(opt["id"], []).append(index)
+            value_id = opt.get("valueId", "")
+            if value_id:
+                self.value_id_groups.setdefault(value_id, []).append(index)
+
+        # Selected option of each valueId group when a profile has no state for it
+        self.default_selection = {}
+        for value_id, siblings in self.value_id_groups.items():
+            global_selected = next((i for i in siblings if self.options[i].get("enableGlobally", False)), None)
+            if global_selected is None:
+                global_selected = next((i for i in siblings if self.options[i].get("fallbackValue", False)), None)
+            self.default_selection[value_id] = self.options[
+                global_selected if global_selected is not None else siblings[0]
+            ]["id"]
+
+        # Commands contributed without profile state, sorted by priority
+        # descending (higher priority = leftmost prefix command). Equal
+        # priorities keep their original order.
+        self.default_parts = sorted(
+            (self._sort_key(index), index)
+            for index in range(len(self.options))
+            if self._get_raw_command(index, self.default_selection, {})
+        )
+
+    def _sort_key(self, index):
+        return -(self.options[index].get("priority", 0) or 0), index
+
+    def _get_raw_command(self, index, selected_by_value_id, profile_state):
+        opt = self.options[index]
+        value_id = opt.get("valueId", "")
+        if value_id:
+            # For valueId groups, only the selected option contributes commands.
+            # Sibling options do not contribute off commands.
+            raw_command = opt["on"] if selected_by_value_id.get(value_id) == opt["id"] else ""
+        else:
+            is_enabled = profile_state.get(opt["id"], opt.get("enableGlobally", False))
+            raw_command = opt["on"] if is_enabled else opt["off"]
+        return raw_command if raw_command and raw_command.strip() else ""
+
+    def parse(self, raw_command):
+        parsed = self.parsed.get(raw_command)
+        if parsed is None:
+            parsed = self.parsed[raw_command] = parse_launch_option(raw_command)
+        return parsed
+
+    def parse_option(self, index, raw_command):
+        """
+        Parse a command of an option, using the form stored with the option
+        when it was saved if it was parsed from the same command.
+        """
+        parsed = self.parsed.get(raw_command)
+        if parsed is not None:
+            return parsed
+
+        stored = self.options[index].get("parsed")
+        if isinstance(stored, dict):
+            source_hash = get_launch_option_hash(raw_command, self.home)
+            for compiled in stored.values():
+                if isinstance(compiled, dict) and compiled.get("hash") == source_hash:
+                    parsed = {
+                        'env_vars': dict(compiled['env_vars']),
+                        'prefix': compiled['prefix'],
+                        'suffix': compiled['suffix'],
+                    }
+                    break
+        if parsed is None:
+            parsed = parse_launch_option(raw_command)
+        self.parsed[raw_command] = parsed
+        return parsed
+
+    def get_selected_value_ids(self, profile_state):
+        """Return the selected option id of every valueId group the profile state touches."""
+        selected_by_value_id = {}
+        explicit_true_indexes = {}
+        for opt_id, value in profile_state.items():
+            for index in self.indexes_by_id.get(opt_id, ()):
+                value_id = self.options[index].get("valueId", "")
+                if not value_id:
+                    continue
+                # Any explicit state on a group without a true means Disabled
+                selected_by_value_id.setdefault(value_id, None)
+                if value is True and index < explicit_true_indexes.get(value_id, index + 1):
+                    explicit_true_indexes[value_id] = index
+                    selected_by_value_id[value_id] = opt_id
+        return selected_by_value_id
+
+    def get_launch_option_parts(self, profile_state):
+        """Return the parsed commands of the enabled options, in priority order."""
+        if not profile_state:
+            return [self.parse_option(index, self._get_raw_command(index, self.default_selection, {}))
+                    for _, index in self.default_parts]
+
+        explicit_selection = self.get_selected_value_ids(profile_state)
+        selected_by_value_id = {**self.default_selection, **explicit_selection}
+
+        # Options whose contribution may differ from the default one
+        touched_indexes = set()
+        for opt_id in profile_state:
+            touched_indexes.update(self.indexes_by_id.get(opt_id, ()))
+        for value_id in explicit_selection:
+            touched_indexes.update(self.value_id_groups[value_id])
+
+        touched_parts = sorted(
+            (self._sort_key(index), index)
+            for index in touched_indexes
+            if self._get_raw_command(index, selected_by_value_id, profile_state)
+        )
+        untouched_parts = [part for part in self.default_parts if part[1] not in touched_indexes]
+
+        return [
+            self.parse_option(index, self._get_raw_command(index, selected_by_value_id, profile_state))
+            for _, index in heapq.merge(untouched_parts, touched_parts)
+        ]
+
+
+_settings_model_cache = (None, None)
+
+
+def get_settings_model(settings, key=None):
+    """
+    Return the settings model of a settings document.
+
+    When a key identifying the settings content is given (e.g. the settings
+    file signature), the model is reused for as long as the key matches.
+    """
+    global _settings_model_cache
+    cached_key, cached_model = _settings_model_cache
+    if key is not None and cached_key == key:
+        return cached_model
+
+    model = SettingsModel(settings)
+    if key is not None:
+        _settings_model_cache = (key, model)
+    return model
 
-    # Safely access settings structure
-    if not settings or "profiles" not in settings or "launchOptions" not in settings:
-        return base_args, {}
 
-    profile = settings["profiles"].get(str(appid), {})
+def resolve_launch_plan(settings, appid, model=None):
+    """
+    Resolve the launch plan of an app without touching sys.argv or os.environ.
+
+    Returns:
+        dict with keys:
+        - 'env_vars': dict of {key: value} environment variables to apply
+        - 'prefixes': list of prefix token lists, in execution order
+        - 'suffixes': list of tokens appended after the game command
+    """
+    if model is None:
+        model = SettingsModel(settings)
+
+    profile = model.profiles.get(str(appid), {})
     profile_state = profile.get("state", {})
     profile_original_launch_options = profile.get("originalLaunchOptions", "")
 
     # Collections for all launch option components
-    env_merge_rules = get_env_variable_merge_rules(settings)
+    env_merge_rules = model.env_merge_rules
     all_env_var_values = {}
     all_prefixes = []
     all_suffixes = []
 
-    # Parse original launch options first
+    # Original launch options come first, then every enabled option
+    launch_option_parts = model.get_launch_option_parts(profile_state)
     if profile_original_launch_options:
-        parsed = parse_launch_option(profile_original_launch_options)
+        launch_option_parts.insert(0, model.parse(profile_original_launch_options))
+
+    for parsed in launch_option_parts:
         add_env_vars(all_env_var_values, env_merge_rules, parsed['env_vars'])
         if parsed['prefix']:
             all_prefixes.append(parsed['prefix'])
         all_suffixes.extend(parsed['suffix'])
 
-    # Resolve selected option per valueId group.
-    value_id_groups = {}
-    for opt in settings["launchOptions"]:
-        value_id = opt.get("valueId", "")
-        if value_id:
-            value_id_groups.setdefault(value_id, []).append(opt)
-
-    selected_by_value_id = {}
-    for value_id, siblings in value_id_groups.items():
-        explicit_true = next((opt["id"] for opt in siblings if profile_state.get(opt["id"]) is True), None)
-        if explicit_true is not None:
-            selected_by_value_id[value_id] = explicit_true
-            continue
-
-        has_explicit_state = any(opt["id"] in profile_state for opt in siblings)
-        if has_explicit_state:
-            selected_by_value_id[value_id] = None
-            continue
-
-        global_selected = next((opt["id"] for opt in siblings if opt.get("enableGlobally", False)), None)
-        if global_selected is not None:
-            selected_by_value_id[value_id] = global_selected
-            continue
+    return {
+        'env_vars': finalize_env_vars(all_env_var_values, env_merge_rules),
+        'prefixes': all_prefixes,
+        'suffixes': all_suffixes,
+    }
 
-        fallback = next((opt["id"] for opt in siblings if opt.get("fallbackValue", False)), None)
-        selected_by_value_id[value_id] = fallback if fallback is not None else siblings[0]["id"]
 
-    # Parse each enabled launch option, collecting with priority for sorting
-    launch_option_parts = []
-    for opt in settings["launchOptions"]:
-        opt_id = opt["id"]
-        value_id = opt.get("valueId", "")
-        enable_globally = opt.get("enableGlobally", False)
-        priority = opt.get("priority", 0) or 0
-        if value_id:
-            is_enabled = selected_by_value_id.get(value_id) == opt_id
-            # For valueId groups, only the selected option contributes commands.
-            # Sibling options do not contribute off commands.
-            raw_command = opt["on"] if is_enabled else ""
-        else:
-            is_enabled = profile_state.get(opt_id, enable_globally)
-            raw_command = opt["on"] if is_enabled else opt["off"]
+def is_prefix_available(executable):
+    import shutil
+    # Check if it's an executable in PATH or an existing file
+    return bool(shutil.which(executable) or os.path.isfile(executable))
 
-        if raw_command and raw_command.strip():
-            parsed = parse_launch_option(raw_command)
-            launch_option_parts.append((priority, parsed))
 
-    # Sort by priority descending (higher priority = leftmost prefix command).
-    # Python's sort is stable, so equal-priority options keep their original order.
-    launch_option_parts.sort(key=lambda x: x[0], reverse=True)
+class ExecutableResolver:
+    """
+    Resolve prefix executables through the persisted executable cache.
 
-    # Merge sorted results into collectors
-    for priority, parsed in launch_option_parts:
-        add_env_vars(all_env_var_values, env_merge_rules, parsed['env_vars'])
-        if parsed['prefix']:
-            all_prefixes.append(parsed['prefix'])
-        all_suffixes.extend(parsed['suffix'])
+    The cache holds a section per PATH value. A section is only trusted while
+    the mtimes of its PATH directories are unchanged, since adding or removing
+    an executable updates the mtime of its directory.
+    """
 
-    all_env_vars = finalize_env_vars(all_env_var_values, env_merge_rules)
-
-    # Apply all environment variables
-    for key, value in all_env_vars.items():
-        os.environ[key] = value
+    def __init__(self, cache, search_path=None):
+        self.cache = cache
+        self.search_path = os.environ.get("PATH", os.defpath) if search_path is None else search_path
+        self.directories = self._get_directory_signatures()
+        self.changed = False
 
+        section = cache.get(self.search_path)
+        if isinstance(section, dict) and section.get("directories") == self.directories:
+            self.executables = section.get("executables", {})
+        else:
+            self.executables = {}
+            self.changed = True
+
+    def _get_directory_signatures(self):
+        signatures = {}
+        for directory in self.search_path.split(os.pathsep):
+            if directory in signatures:
+                continue
+            try:
+                signatures[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                signatures[directory] = None
+        return signatures
+
+    def which(self, name):
+        if name not in self.executables:
+            # Only imported on a cache miss
+            import shutil
+            self.executables[name] = shutil.which(name, path=self.search_path)
+            self.changed = True
+        return self.executables[name]
+
+    def is_available(self, executable):
+        if '/' in executable:
+            # Paths are not looked up in PATH, a single stat is enough
+            return os.path.isfile(executable)
+        return bool(self.which(executable)) or os.path.isfile(executable)
+
+    def store(self):
+        """Write the section back into the cache, most recently used last."""
+        self.cache.pop(self.search_path, None)
+        self.cache[self.search_path] = {
+            "directories": self.directories,
+            "executables": self.executables,
+        }
+        for search_path in list(self.cache)[:-MAX_EXECUTABLE_CACHE_PATHS]:
+            del self.cache[search_path]
+
+
+def load_executable_cache():
+    cache = _read_json(EXECUTABLE_CACHE_PATH)
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_executable_cache(cache):
+    tmp_path = f"{EXECUTABLE_CACHE_PATH}.{os.getpid()}.tmp"
+    _write_json(tmp_path, cache)
+    os.replace(tmp_path, EXECUTABLE_CACHE_PATH)
+
+
+def build_final_args(plan, base_args, is_available=is_prefix_available):
     # Build final command: prefixes + base_args + suffixes
     final_args = []
+    home = os.path.expanduser("~")
 
     # Add all prefixes
-    for prefix in all_prefixes:
+    for prefix in plan['prefixes']:
         # Expand ~ in paths
-        expanded_prefix = [part.replace("~", os.path.expanduser("~")) for part in prefix]
+        expanded_prefix = [part.replace("~", home) for part in prefix]
 
         # Check if the command/executable exists
         if expanded_prefix:
-            first_part = expanded_prefix[0]
-            # Check if it's an executable in PATH or an existing file
-            if shutil.which(first_part) or os.path.isfile(first_part):
+            if is_available(expanded_prefix[0]):
                 final_args.extend(expanded_prefix)
         # else: skip this prefix silently if command doesn't exist
         else:
@@ -277,9 +742,139 @@ def get_final_args_details(settings, appid):
     final_args.extend(base_args)
 
     # Add all suffix args at the end
-    final_args.extend(all_suffixes)
+    final_args.extend(plan['suffixes'])
+
+    return final_args
 
-    return final_args, all_env_vars
+
+def resolve_launch_commands(settings, appids, base_args, key=None):
+    """
+    Resolve the final args and env vars of many apps in one pass.
+
+    The settings model and prefix checks are shared by every app, and apps
+    without a profile share a single plan.
+
+    Returns:
+        dict of {appid: {'args': list, 'env_vars': dict}}
+    """
+    model = get_settings_model(settings, key)
+    availability = {}
+    default_plan = None
+
+    def is_available(executable):
+        if executable not in availability:
+            availability[executable] = is_prefix_available(executable)
+        return availability[executable]
+
+    results = {}
+    for appid in appids:
+        appid = str(appid)
+        if appid in model.profiles:
+            plan = resolve_launch_plan(settings, appid, model)
+        else:
+            if default_plan is None:
+                default_plan = resolve_launch_plan(settings, None, model)
+            plan = default_plan
+
+        results[appid] = {
+            'args': build_final_args(plan, base_args, is_available),
+            'env_vars': plan['env_vars'],
+        }
+
+    return results
+
+
+def get_final_args_details(settings, appid):
+    base_args = sys.argv[1:]
+
+    # Safely access settings structure
+    if not settings or "profiles" not in settings or "launchOptions" not in settings:
+        return base_args, {}
+
+    plan = resolve_launch_plan(settings, appid)
+
+    # Apply all environment variables
+    for key, value in plan['env_vars'].items():
+        os.environ[key] = value
+
+    return build_final_args(plan, base_args), plan['env_vars']
+
+
+def _read_generation():
+    """
+    Return the generation of the launch plans, the generation of the SQLite
+    store they were compiled against (None without the store) and the
+    signature of the settings file they were compiled from.
+    """
+    try:
+        with open(GENERATION_PATH, 'r', encoding='utf-8') as f:
+            parts = f.readline().split()
+            signature = json.loads(f.readline() or "null")
+        return int(parts[0]), parts[1] if len(parts) > 1 else None, signature
+    except (OSError, ValueError, IndexError):
+        return None, None, None
+
+
+def _read_store_generation():
+    try:
+        with open(SETTINGS_DB_GENERATION_PATH, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _get_file_signature(file_stat):
+    # Every snapshot is a new file, the inode tells apart snapshots written
+    # within the same mtime tick
+    return [file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size]
+
+
+def get_settings_signature():
+    try:
+        return _get_file_signature(os.stat(SETTINGS_PATH))
+    except OSError:
+        return None
+
+
+def get_settings_key():
+    """Identify the settings content: the settings file and the patches journaled on top of it."""
+    try:
+        journal_size = os.stat(SETTINGS_JOURNAL_PATH).st_size
+    except OSError:
+        journal_size = 0
+    return (get_settings_signature(), journal_size)
+
+
+def get_launch_plan_path(appid):
+    name = str(appid) if appid is not None and str(appid).isdigit() else None
+    return os.path.join(PLANS_PATH, f"{name}.json") if name else None
+
+
+def load_launch_plan(appid):
+    """
+    Load the precompiled launch plan of an app.
+
+    Returns None when the plan is missing or was compiled from another
+    settings generation, in which case the caller has to resolve the
+    settings itself.
+    """
+    if appid is not None and not str(appid).isdigit():
+        return None
+
+    generation, store_generation, signature = _read_generation()
+    if generation is None or store_generation != _read_store_generation():
+        return None
+
+    if signature != get_settings_signature():
+        return None
+
+    plan_path = get_launch_plan_path(appid)
+    plan = _read_json(plan_path) if plan_path else None
+    if plan is None:
+        # Apps without a profile share the default plan
+        plan = _read_json(DEFAULT_PLAN_PATH)
+
+    return plan if isinstance(plan, dict) else None
 
 
 def get_final_args(settings, appid):
@@ -287,59 +882,323 @@ def get_final_args(settings, appid):
     return final_args
 
 
+def resolve_with_resolver(appid, base_args):
+    """
+    Ask the resolver of the loaded plugin for the final args and env vars of
+    a launch, in one round trip over its Unix socket.
+
+    Returns None when the plugin is not loaded or does not answer within
+    RESOLVER_TIMEOUT, in which case the launch is resolved from the files.
+    """
+    if not os.path.exists(RESOLVER_SOCKET_PATH):
+        return None
+
+    # Only needed while the plugin is loaded
+    import socket
+
+    request = {
+        "appid": appid,
+        "args": base_args,
+        "path": os.environ.get("PATH", os.defpath),
+        "cwd": os.getcwd(),
+    }
+    deadline = time.monotonic() + RESOLVER_TIMEOUT
+    data = b""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(RESOLVER_TIMEOUT)
+            client.connect(RESOLVER_SOCKET_PATH)
+            client.sendall(json.dumps(request, separators=(',', ':')).encode('utf-8') + b"\n")
+            while not data.endswith(b"\n"):
+                client.settimeout(max(deadline - time.monotonic(), 0.001))
+                chunk = client.recv(64 * 1024)
+                if not chunk:
+                    return None
+                data += chunk
+        response = json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(response, dict)
+        or not isinstance(response.get("args"), list)
+        or not isinstance(response.get("env_vars"), dict)
+    ):
+        return None
+    return response
+
+
+def get_timestamp():
+    """Return the local time in the format of datetime.now().isoformat(), without importing datetime."""
+    now = time.time_ns()
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now // 1_000_000_000)) + f".{now // 1000 % 1_000_000:06d}"
+
+
+class LaunchTimer:
+    """
+    Measure how long each stage of a launch takes, in microseconds.
+
+    The launcher exports its start time in DLO_LAUNCH_START (microseconds
+    since the epoch), which gives the time spent starting the interpreter
+    and importing this module. Writing the launch record is timed by
+    write_launch_record itself. The exec of the game replaces this process
+    and cannot be timed from within it.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.last = time.monotonic_ns()
+        launch_start = os.environ.pop("DLO_LAUNCH_START", "")
+        if launch_start.isdigit():
+            self.timings["interpreter"] = max(0, time.time_ns() // 1000 - int(launch_start))
+
+    def mark(self, stage):
+        now = time.monotonic_ns()
+        self.timings[stage] = self.timings.get(stage, 0) + (now - self.last) // 1000
+        self.last = now
+
+
+def encode_launch_record(record):
+    """Encode a launch record as a fixed-size, newline terminated journal entry."""
+    data = json.dumps(record, separators=(',', ':')).encode('ascii')
+    if len(data) >= LAUNCH_RECORD_SIZE:
+        data = json.dumps({
+            "timestamp": record.get("timestamp"),
+            "appid": record.get("appid"),
+            "source": record.get("source"),
+            "sequence": record.get("sequence"),
+            "truncated": True,
+        }, separators=(',', ':')).encode('ascii')
+    return data.ljust(LAUNCH_RECORD_SIZE - 1) + b'\n'
+
+
+def get_launch_journal_head_path():
+    return os.path.join(LAUNCH_JOURNAL_PATH, "head")
+
+
+def _get_launch_slot_path(sequence):
+    return os.path.join(LAUNCH_JOURNAL_PATH, str(sequence % MAX_LAUNCH_RECORDS))
+
+
+def _read_launch_journal_head():
+    """Return the sequence number of the next launch record."""
+    try:
+        with open(get_launch_journal_head_path(), 'rb') as f:
+            return int(f.readline())
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return 0
+
+
+def _write_in_place(path, data):
+    # Overwritten without truncating first, so readers never see an empty file
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def write_launch_record(record):
+    """
+    Write a launch record into the next slot of the launch journal.
+
+    The journal is a ring of MAX_LAUNCH_RECORDS slot files of
+    LAUNCH_RECORD_SIZE bytes, next to a head file holding the sequence number
+    of the next record. It never grows past its slots, whether the plugin
+    runs or not. The record is written into its slot with a single write
+    before the head moves past it, so readers only see complete records.
+    Two launches starting at the very same time may claim the same slot, in
+    which case only one of their records is kept.
+
+    When the record has timings, the time this write took is filled into
+    their "journal" stage afterwards, in place of reserved digits.
+    """
+    start = time.monotonic_ns()
+    os.makedirs(LAUNCH_JOURNAL_PATH, exist_ok=True)
+    sequence = _read_launch_journal_head()
+    reserved = 10 ** JOURNAL_TIMING_WIDTH - 1
+    if isinstance(record.get("timings"), dict):
+        record = {**record, "timings": {**record["timings"], "journal": reserved}}
+    data = encode_launch_record({**record, "sequence": sequence})
+    placeholder = data.rfind(b'"journal":%d' % reserved)
+    if placeholder != -1:
+        placeholder += len(b'"journal":')
+        # Readers see 0 until the duration is known, JSON allows the spaces
+        data = data[:placeholder] + b'0'.rjust(JOURNAL_TIMING_WIDTH) + data[placeholder + JOURNAL_TIMING_WIDTH:]
+
+    fd = os.open(_get_launch_slot_path(sequence), os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        _write_in_place(get_launch_journal_head_path(), f"{sequence + 1}\n".encode('ascii'))
+        if placeholder != -1:
+            duration = str((time.monotonic_ns() - start) // 1000).rjust(JOURNAL_TIMING_WIDTH)
+            os.pwrite(fd, duration.encode('ascii'), placeholder)
+    finally:
+        os.close(fd)
+
+
+def _read_launch_record(sequence):
+    try:
+        with open(_get_launch_slot_path(sequence), 'rb') as f:
+            record = json.loads(f.read(LAUNCH_RECORD_SIZE))
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+    # The slot may already hold a later record
+    if not isinstance(record, dict) or record.get("sequence") != sequence:
+        return None
+    return record
+
+
+def read_launch_records(appid=None, offset=0, limit=1):
+    """
+    Read launch records from the launch journal, most recent first.
+
+    Records are read one slot at a time from the most recent one, so only the
+    records up to the requested ones are read.
+    """
+    records = []
+    head = _read_launch_journal_head()
+    for sequence in range(head - 1, max(0, head - MAX_LAUNCH_RECORDS) - 1, -1):
+        if len(records) >= limit:
+            break
+        record = _read_launch_record(sequence)
+        if record is None:
+            continue
+        if appid is not None and str(record.get("appid")) != str(appid):
+            continue
+        if offset > 0:
+            offset -= 1
+            continue
+        records.append(record)
+    return records
+
+
+def read_launch_records_since(cursor=None, appid=None, limit=MAX_LAUNCH_RECORDS):
+    """
+    Read the launch records written after `cursor`, oldest first, together
+    with the cursor to pass to the next call.
+
+    Only the new records are read. Without a cursor, or when records written
+    since the cursor was returned have been overwritten already, the last
+    `limit` records are read instead and "reset" is set. At most the last
+    `limit` new records are returned.
+    """
+    try:
+        with open(get_launch_journal_head_path(), 'rb') as f:
+            head_stat = os.fstat(f.fileno())
+            head = int(f.readline())
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return {"cursor": None, "records": [], "reset": cursor is not None}
+
+    oldest = max(0, head - MAX_LAUNCH_RECORDS)
+    reset = not (
+        isinstance(cursor, list)
+        and len(cursor) == 2
+        and cursor[0] == head_stat.st_ino
+        and isinstance(cursor[1], int)
+        and oldest <= cursor[1] <= head
+    )
+    records = []
+    for sequence in range(max(oldest if reset else cursor[1], head - limit), head):
+        record = _read_launch_record(sequence)
+        if record is None:
+            continue
+        if appid is not None and str(record.get("appid")) != str(appid):
+            continue
+        records.append(record)
+    return {"cursor": [head_stat.st_ino, head], "records": records, "reset": reset}
+
+
+def format_launch_record(record):
+    lines = [
+        "=== CURRENT LAUNCH ===",
+        f"Timestamp: {record.get('timestamp')}",
+        f"AppID: {record.get('appid')}",
+        "",
+    ]
+    if record.get("truncated"):
+        lines.extend(["(record too large to be stored)", ""])
+    else:
+        lines.append("[Original Args]")
+        lines.extend(f"{i:02d}: {arg}" for i, arg in enumerate(record.get("args", [])))
+        lines.extend(["", "[Final Executable Args]"])
+        lines.extend(f"{i:02d}: {arg}" for i, arg in enumerate(record.get("final_args", [])))
+        lines.extend(["", "[Applied Environment Variables]"])
+        env_vars = record.get("env_vars") or {}
+        if env_vars:
+            lines.extend(f"{key}={env_vars[key]}" for key in sorted(env_vars))
+        else:
+            lines.append("(none)")
+        lines.append("")
+    lines.append("=== END CURRENT LAUNCH ===")
+    return "\n".join(lines) + "\n"
+
+
 if __name__ == "__main__":
     # Ensure we always have fallback values
     if not executable:
         # If no executable provided, just exit
         sys.exit(1)
 
+    timer = LaunchTimer()
     try:
         appid = get_steam_appid()
-        settings = get_settings()
 
         executable_args = args
         applied_env_vars = {}
-        if settings:
-            try:
-                executable_args, applied_env_vars = get_final_args_details(settings, appid)
-            except Exception:
-                # Failed to apply launch options, fall back to original command
-                executable_args = args
-                applied_env_vars = {}
-
-        # Try to write logs, but don't let it block execution
+        executable_resolver = None
         try:
-            def write_logs():
-                log_path = Path(LOG_FILE)
-                log_path.parent.mkdir(parents=True, exist_ok=True)
-
-                with open(LOG_FILE, "w", encoding="utf-8") as f:
-                    f.write("=== CURRENT LAUNCH ===\n")
-                    f.write(f"Timestamp: {datetime.datetime.now().isoformat()}\n")
-                    f.write(f"AppID: {appid}\n")
-                    f.write("\n")
-
-                    f.write("[Original Args]\n")
-                    for i, arg in enumerate(args):
-                        f.write(f"{i:02d}: {arg}\n")
-                    f.write("\n")
-
-                    f.write("[Final Executable Args]\n")
-                    for i, arg in enumerate(executable_args):
-                        f.write(f"{i:02d}: {arg}\n")
-                    f.write("\n")
-
-                    f.write("[Applied Environment Variables]\n")
-                    if applied_env_vars:
-                        for key in sorted(applied_env_vars.keys()):
-                            f.write(f"{key}={applied_env_vars[key]}\n")
-                    else:
-                        f.write("(none)\n")
-                    f.write("\n")
+            plan = None
+            resolved = resolve_with_resolver(appid, args)
+            timer.mark("resolver")
+            if resolved is not None:
+                applied_env_vars = resolved['env_vars']
+                os.environ.update(applied_env_vars)
+                executable_args = resolved['args']
+            else:
+                plan = load_launch_plan(appid)
+                timer.mark("settings")
+                if plan is None:
+                    settings = get_app_settings(appid)
+                    timer.mark("settings")
+                    if settings and "profiles" in settings and "launchOptions" in settings:
+                        plan = resolve_launch_plan(settings, appid)
+                        timer.mark("resolve")
+
+            if plan is not None:
+                applied_env_vars = plan['env_vars']
+                os.environ.update(applied_env_vars)
+                # Created after the env vars are applied so it sees the final PATH
+                executable_resolver = ExecutableResolver(load_executable_cache())
+                executable_args = build_final_args(plan, args, executable_resolver.is_available)
+        except Exception:
+            # Failed to apply launch options, fall back to original command
+            executable_args = args
+            applied_env_vars = {}
 
-                    f.write("=== END CURRENT LAUNCH ===\n")
+        # Remember executables resolved on a cache miss for the next launch
+        try:
+            if executable_resolver is not None and executable_resolver.changed:
+                executable_resolver.store()
+                save_executable_cache(executable_resolver.cache)
+        except Exception:
+            pass
+        timer.mark("prefixes")
 
-            write_logs()
+        # Try to record the launch, but don't let it block execution
+        try:
+            record = {
+                "timestamp": get_timestamp(),
+                "appid": appid,
+                "source": "python",
+                "args": args,
+                "final_args": executable_args,
+                "env_vars": applied_env_vars,
+            }
+            # The journal write is timed by write_launch_record
+            timer.mark("record")
+            record["timings"] = timer.timings
+            write_launch_record(record)
         except Exception:
             # Logging failed, but continue execution
             pass
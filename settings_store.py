@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import threading
+
+from shared import SETTINGS_DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS launch_options (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    appid TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_state (
+    appid TEXT NOT NULL,
+    launch_option_id TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (appid, launch_option_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS profile_state_launch_option_id ON profile_state (launch_option_id);
+CREATE TABLE IF NOT EXISTS env_variable_merges (
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+PROFILE_FIELDS = ("originalLaunchOptions", "disableAutoManageLaunchOptions")
+
+
+class SettingsStore:
+    """
+    Settings stored in a SQLite database in WAL mode.
+
+    Launch options, per-app state and env variable merge rules have their own
+    tables, so a launch reads the profile of its app with one indexed query
+    instead of parsing every profile. The launcher reading while the plugin
+    writes is handled by the database.
+
+    The generation of every commit is also published in a file next to the
+    database, so the launchers can tell whether their launch plans are
+    current without opening it.
+    """
+
+    def __init__(self, path=SETTINGS_DB_PATH, read_only=False):
+        """
+        Open the store, creating it unless read_only. A read-only store
+        missing its database or its tables raises sqlite3.OperationalError
+        on the first read.
+        """
+        self.path = path
+        self.generation_path = f"{path}.generation"
+        self.lock = threading.Lock()
+        if read_only:
+            self.connection = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            return
+        self.connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_data_version(self):
+        """Return a value that changes whenever another connection commits."""
+        with self.lock:
+            return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _read_meta(self):
+        return dict(self.connection.execute("SELECT key, value FROM meta"))
+
+    def _read_shared_settings(self):
+        meta = self._read_meta()
+        settings = {
+            "profiles": {},
+            "launchOptions": [
+                json.loads(data)
+                for data, in self.connection.execute("SELECT data FROM launch_options ORDER BY position")
+            ],
+            "generation": int(meta.get("generation", 0)),
+        }
+        if meta.get("has_env_variable_merges") == "1":
+            settings["envVariableMerges"] = [
+                json.loads(data)
+                for data, in self.connection.execute("SELECT data FROM env_variable_merges ORDER BY position")
+            ]
+        return settings
+
+    def _read_profiles(self, appid=None):
+        profiles = {}
+        where, params = ("WHERE appid = ?", (appid,)) if appid is not None else ("", ())
+        for profile_appid, data in self.connection.execute(f"SELECT appid, data FROM profiles {where}", params):
+            profile = json.loads(data)
+            profile["state"] = {}
+            profiles[profile_appid] = profile
+        for profile_appid, launch_option_id, value in self.connection.execute(
+            f"SELECT appid, launch_option_id, value FROM profile_state {where}",
+            params,
+        ):
+            if profile_appid in profiles:
+                profiles[profile_appid]["state"][launch_option_id] = bool(value)
+        return profiles
+
+    def read_settings(self):
+        """Read the whole settings document."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                settings = self._read_shared_settings()
+                settings["profiles"] = self._read_profiles()
+            finally:
+                self.connection.execute("COMMIT")
+        return settings
+
+    def read_app_settings(self, appid):
+        """Read the settings with only the profile of one app."""
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                settings = self._read_shared_settings()
+                if appid is not None:
+                    settings["profiles"] = self._read_profiles(str(appid))
+            finally:
+                self.connection.execute("COMMIT")
+        return settings
+
+    def _bump_generation(self):
+        generation = int(self._read_meta().get("generation", 0)) + 1
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation),))
+        # Published before the commit: until the plans are compiled for this
+        # generation, or if the commit fails, they just look stale
+        tmp_path = f"{self.generation_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{generation}\n")
+        os.replace(tmp_path, self.generation_path)
+        return generation
+
+    def _write_profile(self, appid, profile):
+        data = {key: value for key, value in profile.items() if key != "state"}
+        self.connection.execute("INSERT OR REPLACE INTO profiles (appid, data) VALUES (?, ?)", (appid, json.dumps(data)))
+
+    def write_settings(self, settings):
+        """Replace the whole settings document in one transaction and return its generation."""
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("launch_options", "profiles", "profile_state", "env_variable_merges"):
+                    self.connection.execute(f"DELETE FROM {table}")
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO launch_options (id, position, data) VALUES (?, ?, ?)",
+                    (
+                        (launch_option.get("id"), position, json.dumps(launch_option))
+                        for position, launch_option in enumerate(settings.get("launchOptions") or [])
+                    ),
+                )
+                for appid, profile in (settings.get("profiles") or {}).items():
+                    if not isinstance(profile, dict):
+                        continue
+                    self._write_profile(str(appid), profile)
+                    self.connection.executemany(
+                        "INSERT INTO profile_state (appid, launch_option_id, value) VALUES (?, ?, ?)",
+                        ((str(appid), key, bool(value)) for key, value in (profile.get("state") or {}).items()),
+                    )
+                env_variable_merges = settings.get("envVariableMerges")
+                self.connection.executemany(
+                    "INSERT INTO env_variable_merges (position, data) VALUES (?, ?)",
+                    ((position, json.dumps(item)) for position, item in enumerate(env_variable_merges or [])),
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('has_env_variable_merges', ?)",
+                    ("1" if env_variable_merges is not None else "0",),
+                )
+                generation = self._bump_generation()
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        return generation
+
+    def apply_patch(self, ops):
+        """
+        Apply field-level patch operations in one transaction and return the
+        new generation. Operations have the same meaning as for
+        run.apply_settings_patch.
+        """
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for op in ops:
+                    self._apply_operation(op)
+                generation = self._bump_generation()
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        return generation
+
+    def _apply_operation(self, op):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind in ("set_profile_state", "set_profile_field"):
+            appid = str(op.get("appid"))
+            row = self.connection.execute("SELECT data FROM profiles WHERE appid = ?", (appid,)).fetchone()
+            profile = json.loads(row[0]) if row else {"originalLaunchOptions": ""}
+            if kind == "set_profile_state":
+                key = op.get("id")
+                if not isinstance(key, str):
+                    raise ValueError(f"Invalid patch operation: {op}")
+                if op.get("value") is None:
+                    self.connection.execute(
+                        "DELETE FROM profile_state WHERE appid = ? AND launch_option_id = ?",
+                        (appid, key),
+                    )
+                else:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO profile_state (appid, launch_option_id, value) VALUES (?, ?, ?)",
+                        (appid, key, bool(op["value"])),
+                    )
+            else:
+                key = op.get("field")
+                if key not in PROFILE_FIELDS:
+                    raise ValueError(f"Invalid profile field: {key}")
+                if op.get("value") is None:
+                    profile.pop(key, None)
+                else:
+                    profile[key] = op["value"]
+            if kind == "set_profile_field" or not row:
+                self._write_profile(appid, profile)
+        elif kind == "upsert_launch_option":
+            launch_option = op.get("option")
+            if not isinstance(launch_option, dict) or not launch_option.get("id"):
+                raise ValueError(f"Invalid launch option: {launch_option}")
+            updated = self.connection.execute(
+                "UPDATE launch_options SET data = ? WHERE id = ?",
+                (json.dumps(launch_option), launch_option["id"]),
+            ).rowcount
+            if not updated:
+                # New launch options are listed first, like in the UI
+                self.connection.execute(
+                    "INSERT INTO launch_options (id, position, data) "
+                    "VALUES (?, (SELECT COALESCE(MIN(position), 0) - 1 FROM launch_options), ?)",
+                    (launch_option["id"], json.dumps(launch_option)),
+                )
+        elif kind == "delete_launch_option":
+            self.connection.execute("DELETE FROM launch_options WHERE id = ?", (op.get("id"),))
+            self.connection.execute("DELETE FROM profile_state WHERE launch_option_id = ?", (op.get("id"),))
+        else:
+            raise ValueError(f"Invalid patch operation: {op}")
@@ -3,3 +3,16 @@ import os
 SETTINGS_FOLDER_NAME = '.dlo'
 SETTINGS_FOLDER_PATH = os.path.join(os.path.expanduser('~'), SETTINGS_FOLDER_NAME)
 SETTINGS_PATH = f"{os.path.join(SETTINGS_FOLDER_PATH, 'settings.json')}"
+PLANS_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'plans')
+DEFAULT_PLAN_PATH = os.path.join(PLANS_PATH, 'default.json')
+GENERATION_PATH = os.path.join(PLANS_PATH, 'generation')
+EXECUTABLE_CACHE_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'executables.json')
+# Ring of launch record slots, see run.write_launch_record
+LAUNCH_JOURNAL_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'launches')
+SETTINGS_JOURNAL_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'settings.journal')
+SETTINGS_DB_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'settings.db')
+# Generation of the SQLite store, published next to it for the launchers
+SETTINGS_DB_GENERATION_PATH = f"{SETTINGS_DB_PATH}.generation"
+# Only the user can reach the socket, in its 0700 folder
+RESOLVER_FOLDER_PATH = os.path.join(SETTINGS_FOLDER_PATH, 'resolver')
+RESOLVER_SOCKET_PATH = os.path.join(RESOLVER_FOLDER_PATH, 'resolver.sock')
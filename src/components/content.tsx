@@ -12,10 +12,15 @@ import {
   SingleDropdownOption,
   ToggleField,
 } from "@decky/ui"
+import { addEventListener, removeEventListener } from "@decky/api"
 import { useStore } from "@tanstack/react-store"
 import { useEffect, useState } from "react"
 import { FaChevronDown, FaChevronUp } from "react-icons/fa"
-import { get_debug_log, useGetInfoQuery } from "../query"
+import {
+  get_debug_log_since,
+  type LaunchJournalCursor,
+  useGetInfoQuery,
+} from "../query"
 import { batchCreateLaunchOptionsEventType, routes } from "../shared"
 import {
   type LaunchOptionSort,
@@ -29,10 +34,21 @@ function DebugLogModal({ onClose }: { onClose: () => void }) {
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    get_debug_log().then((result) => {
-      setLog(result)
-      setLoading(false)
-    })
+    let cursor: LaunchJournalCursor | null = null
+    function refresh() {
+      // Only launches recorded after the last refresh are read
+      get_debug_log_since(cursor).then((result) => {
+        cursor = result.cursor
+        if (result.log || result.reset) setLog(result.log)
+        setLoading(false)
+      })
+    }
+
+    refresh()
+    addEventListener("launch_recorded", refresh)
+    return () => {
+      removeEventListener("launch_recorded", refresh)
+    }
   }, [])
 
   return (
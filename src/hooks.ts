@@ -10,8 +10,100 @@ import {
   launchOptionFactory,
   profileFactory,
   Settings,
+  SettingsPatchOperation,
 } from "./shared"
-import { useGetSettingsQuery, useSetSettingsMutation } from "./query"
+import {
+  useGetSettingsQuery,
+  usePatchSettingsMutation,
+  useSetSettingsMutation,
+} from "./query"
+
+const profileFields = [
+  "originalLaunchOptions",
+  "disableAutoManageLaunchOptions",
+] as const
+
+/**
+ * Describe the change between two settings as field-level patch operations,
+ * so that only the change is sent to the backend. Returns null when the change
+ * cannot be described as a patch and the whole settings have to be saved.
+ */
+export function getSettingsPatch(
+  prev: Settings,
+  next: Settings,
+): SettingsPatchOperation[] | null {
+  if (prev.envVariableMerges !== next.envVariableMerges) return null
+
+  const ops: SettingsPatchOperation[] = []
+  for (const appid of Object.keys(prev.profiles)) {
+    if (!next.profiles[appid]) return null
+  }
+  for (const [appid, profile] of Object.entries(next.profiles)) {
+    const prevProfile = prev.profiles[appid]
+    if (profile === prevProfile) continue
+
+    const prevState = prevProfile?.state || {}
+    for (const id of new Set([
+      ...Object.keys(prevState),
+      ...Object.keys(profile.state),
+    ])) {
+      if (prevState[id] === profile.state[id]) continue
+      ops.push({
+        op: "set_profile_state",
+        appid,
+        id,
+        value: profile.state[id] ?? null,
+      })
+    }
+    for (const field of profileFields) {
+      if (prevProfile && prevProfile[field] === profile[field]) continue
+      ops.push({
+        op: "set_profile_field",
+        appid,
+        field,
+        value: profile[field] ?? null,
+      })
+    }
+  }
+
+  if (prev.launchOptions !== next.launchOptions) {
+    const prevById = new Map(prev.launchOptions.map((item) => [item.id, item]))
+    const nextIds = new Set(next.launchOptions.map((item) => item.id))
+    const keptIds = prev.launchOptions
+      .map((item) => item.id)
+      .filter((id) => nextIds.has(id))
+    // New launch options come first, any other reordering needs a full save
+    const createdCount = next.launchOptions.findIndex((item) =>
+      prevById.has(item.id),
+    )
+    const created = next.launchOptions.slice(
+      0,
+      createdCount === -1 ? next.launchOptions.length : createdCount,
+    )
+    const kept = next.launchOptions.slice(created.length)
+    if (
+      kept.length !== keptIds.length ||
+      kept.some((item, index) => item.id !== keptIds[index])
+    ) {
+      return null
+    }
+
+    for (const item of prev.launchOptions) {
+      if (!nextIds.has(item.id)) {
+        ops.push({ op: "delete_launch_option", id: item.id })
+      }
+    }
+    for (const item of kept) {
+      if (item !== prevById.get(item.id)) {
+        ops.push({ op: "upsert_launch_option", option: item })
+      }
+    }
+    for (const item of [...created].reverse()) {
+      ops.push({ op: "upsert_launch_option", option: item })
+    }
+  }
+  return ops
+}
 
 export function useSettings() {
   const [settings, _setSettings] = useState<Settings>({
@@ -22,6 +114,7 @@ export function useSettings() {
 
   const getSettingsQuery = useGetSettingsQuery()
   const setSettingsMutation = useSetSettingsMutation()
+  const patchSettingsMutation = usePatchSettingsMutation()
   const initializedRef = useRef(false)
 
   const normalizeSettings = (nextSettings?: Settings | null): Settings => {
@@ -51,7 +144,12 @@ export function useSettings() {
     if (!initializedRef.current) return
     _setSettings((prev) => {
       const newSettings = produce(prev, draftSettings)
-      setSettingsMutation.mutate(newSettings)
+      const ops = getSettingsPatch(prev, newSettings)
+      if (!ops) {
+        setSettingsMutation.mutate(newSettings)
+      } else if (ops.length > 0) {
+        patchSettingsMutation.mutate(ops)
+      }
       return newSettings
     })
   }
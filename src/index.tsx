@@ -1,5 +1,10 @@
 import { staticClasses } from "@decky/ui"
-import { definePlugin, routerHook } from "@decky/api"
+import {
+  addEventListener,
+  definePlugin,
+  removeEventListener,
+  routerHook,
+} from "@decky/api"
 import { FaTerminal } from "react-icons/fa"
 import {
   batchCreateLaunchOptionsEventType,
@@ -11,7 +16,7 @@ import { AppLaunchOptionsPage } from "./teams/launch-options/views/[_appid]"
 import { EnvVariableMergesPage } from "./teams/env-variable-merges/views"
 import { QueryClientProvider } from "@tanstack/react-query"
 import contextMenuPatch, { LibraryContextMenu } from "./patches/context-menu"
-import { getSettingsQueryOptions, queryClient } from "./query"
+import { getSettingsQueryOptions, keys, queryClient } from "./query"
 import { libraryAppPatch } from "./patches/library-app"
 import { Content } from "./components/content"
 import { batchCreateLaunchOptions } from "./components/batch-add-launch-options"
@@ -53,6 +58,12 @@ export default definePlugin(() => {
     batchCreateLaunchOptionsEventType as any,
     onBatchCreateLaunchOptions,
   )
+  // Settings changed by the launcher, another device or by hand
+  function onSettingsChanged() {
+    queryClient.invalidateQueries({ queryKey: keys.settings() })
+  }
+
+  addEventListener("settings_changed", onSettingsChanged)
   ;(window as any).hasDeckyLaunchOptions = true
   return {
     name: "Launch Options",
@@ -84,6 +95,7 @@ export default definePlugin(() => {
         batchCreateLaunchOptionsEventType as any,
         onBatchCreateLaunchOptions,
       )
+      removeEventListener("settings_changed", onSettingsChanged)
       delete (window as any).hasDeckyLaunchOptions
     },
   }
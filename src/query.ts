@@ -1,5 +1,5 @@
 import { callable } from "@decky/api"
-import { Settings } from "./shared"
+import { LaunchOption, Settings, SettingsPatchOperation } from "./shared"
 import {
   QueryClient,
   queryOptions,
@@ -32,22 +32,87 @@ export const get_info = callable<
     SHORT_SH_COMMAND_PATH: string
     FULL_SH_COMMAND_PATH: string
     COMMAND: string
-    DEBUG_LOG_PATH: string
+    LAUNCH_JOURNAL_PATH: string
+    PLANS_PATH: string
+    SETTINGS_JOURNAL_PATH: string
+    SETTINGS_DB_PATH: string
+    SETTINGS_EXPORT_PATH: string
+    RESOLVER_SOCKET_PATH: string
     BACKUPS_PATH: string
   }
 >("get_info")
 export const get_settings = callable<[], Settings | null>("get_settings")
 export const set_settings = callable<[Settings], void>("set_settings")
+export const patch_settings = callable<[ops: SettingsPatchOperation[]], void>(
+  "patch_settings",
+)
+export const set_profile_state = callable<
+  [appid: string, launchOptionId: string, value: boolean | null],
+  void
+>("set_profile_state")
+export const upsert_launch_option = callable<
+  [launchOption: LaunchOption],
+  void
+>("upsert_launch_option")
+export const apply_launch_option_to_apps = callable<
+  [launchOptionId: string, appids: string[], value: boolean | null],
+  void
+>("apply_launch_option_to_apps")
+export const get_settings_store = callable<[], SettingsStoreName>(
+  "get_settings_store",
+)
+export const set_settings_store = callable<[name: SettingsStoreName], void>(
+  "set_settings_store",
+)
+export const compact_settings = callable<
+  [],
+  {
+    removed_state: number
+    removed_profiles: number
+    bytes_saved: number
+  } | null
+>("compact_settings")
+export const export_settings = callable<[path?: string], string | null>(
+  "export_settings",
+)
 export const has_shell_script = callable<[], boolean>("has_shell_script")
-export const get_debug_log = callable<[], string | null>("get_debug_log")
+export const get_steam_users = callable<[], SteamUser[]>("get_steam_users")
+export const import_localconfig_launch_options = callable<
+  [],
+  { found: number; backed_up: number; imported: number } | null
+>("import_localconfig_launch_options")
+export const get_debug_log = callable<
+  [appid?: string | null, offset?: number],
+  string | null
+>("get_debug_log")
+export const get_debug_log_since = callable<
+  [cursor?: LaunchJournalCursor | null, appid?: string | null],
+  { cursor: LaunchJournalCursor | null; log: string | null; reset: boolean }
+>("get_debug_log_since")
+export const get_launch_records_since = callable<
+  [cursor?: LaunchJournalCursor | null, appid?: string | null, limit?: number],
+  {
+    cursor: LaunchJournalCursor | null
+    records: LaunchRecord[]
+    reset: boolean
+  }
+>("get_launch_records_since")
+export const get_launch_history = callable<
+  [appid?: string | null, offset?: number, limit?: number],
+  LaunchRecord[]
+>("get_launch_history")
 export const backup_original_launch_options = callable<
   [appid: string, command: string],
   void
 >("backup_original_launch_options")
 export const get_original_launch_options_backups = callable<
-  [appid: string],
+  [appid: string, offset?: number, limit?: number | null],
   OriginalLaunchOptionsBackup[]
 >("get_original_launch_options_backups")
+export const get_original_launch_options_backup = callable<
+  [appid: string, backupId: string],
+  (OriginalLaunchOptionsBackup & { command: string }) | null
+>("get_original_launch_options_backup")
 export const delete_original_launch_options_backup = callable<
   [appid: string, backupId: string],
   void
@@ -56,11 +121,99 @@ export const delete_original_launch_options_backups = callable<
   [appid: string],
   void
 >("delete_original_launch_options_backups")
+export const backup_original_launch_options_for_apps = callable<
+  [items: [appid: string, command: string][]],
+  BulkBackupResult[]
+>("backup_original_launch_options_for_apps")
+export const get_original_launch_options_backups_for_apps = callable<
+  [appids: string[], limit?: number | null],
+  Record<string, OriginalLaunchOptionsBackup[]>
+>("get_original_launch_options_backups_for_apps")
+export const restore_original_launch_options_for_apps = callable<
+  [items: (string | [appid: string, backupId: string])[]],
+  (BulkBackupResult & { backupId?: string; command?: string })[]
+>("restore_original_launch_options_for_apps")
+export const delete_original_launch_options_backups_for_apps = callable<
+  [appids: string[]],
+  BulkBackupResult[]
+>("delete_original_launch_options_backups_for_apps")
+export const get_backup_policy = callable<[], BackupPolicy>("get_backup_policy")
+export const set_backup_policy = callable<
+  [policy: Partial<BackupPolicy>],
+  void
+>("set_backup_policy")
+export const compact_backups = callable<
+  [],
+  {
+    removed_backups: number
+    removed_objects: number
+    freed_bytes: number
+  } | null
+>("compact_backups")
+
+export const get_launch_timings = callable<
+  [appid?: string | null],
+  {
+    stages: LaunchStageTimings
+    apps: Record<string, LaunchStageTimings>
+  }
+>("get_launch_timings")
+export const preview_launch_commands = callable<
+  [appids?: string[] | null, command?: string],
+  Record<string, LaunchCommandPreview>
+>("preview_launch_commands")
+
+export type SettingsStoreName = "json" | "sqlite"
+
+export type LaunchStageTimings = Record<
+  string,
+  { count: number; p50: number; p90: number; p99: number; max: number }
+>
+
+// Position in the launch journal returned by the *_since callables
+export type LaunchJournalCursor = [inode: number, sequence: number]
+
+export interface LaunchRecord {
+  timestamp: string
+  appid: string | null
+  source: "python" | "shell"
+  args?: string[]
+  final_args?: string[]
+  env_vars?: Record<string, string>
+  timings?: Record<string, number>
+  truncated?: boolean
+}
+
+export interface LaunchCommandPreview {
+  args: string[]
+  env_vars: Record<string, string>
+}
 
 export interface OriginalLaunchOptionsBackup {
   id: string
   date: string
-  command: string
+  size: number
+  preview: string
+  hash: string
+}
+
+export interface SteamUser {
+  id: string
+  path: string
+  localconfig: string | null
+}
+
+export interface BulkBackupResult {
+  appid: string
+  ok: boolean
+  error?: string
+}
+
+export interface BackupPolicy {
+  // At least 1, the most recent backup of an app is always kept
+  keepLast: number | null
+  maxAgeDays: number | null
+  compressAbove: number | null
 }
 
 export const useGetInfoQuery = () =>
@@ -92,6 +245,18 @@ export const useSetSettingsMutation = () =>
     },
   })
 
+export const usePatchSettingsMutation = () =>
+  useMutation<void, Error, SettingsPatchOperation[]>({
+    mutationFn(ops) {
+      return patch_settings(ops)
+    },
+    onSuccess() {
+      queryClient.refetchQueries({
+        queryKey: keys.settings(),
+      })
+    },
+  })
+
 export const useBackupOriginalLaunchOptionsMutation = () =>
   useMutation<void, Error, { appid: string; command: string }>({
     mutationFn(data) {
@@ -99,11 +264,14 @@ export const useBackupOriginalLaunchOptionsMutation = () =>
     },
   })
 
-export const useGetOriginalLaunchOptionsBackupsQuery = (appid: string) =>
+export const useGetOriginalLaunchOptionsBackupsQuery = (
+  appid: string,
+  limit: number,
+) =>
   useQuery({
-    queryKey: keys.originalLaunchOptionsBackups(appid),
+    queryKey: [...keys.originalLaunchOptionsBackups(appid), limit],
     queryFn() {
-      return get_original_launch_options_backups(appid)
+      return get_original_launch_options_backups(appid, 0, limit)
     },
   })
 
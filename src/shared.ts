@@ -67,6 +67,16 @@ export type LaunchOption = {
   valueName: string
   fallbackValue: boolean
   priority: number
+  // Written by the backend when the option is saved, launches use it instead
+  // of parsing the command
+  parsed?: Partial<Record<"on" | "off", ParsedLaunchOption>>
+}
+
+export type ParsedLaunchOption = {
+  hash: string
+  env_vars: [key: string, value: string][]
+  prefix: string[]
+  suffix: string[]
 }
 
 export type EnvVariableMerge = {
@@ -80,3 +90,19 @@ export type Settings = {
   launchOptions: LaunchOption[]
   envVariableMerges: EnvVariableMerge[]
 }
+
+export type SettingsPatchOperation =
+  | {
+      op: "set_profile_state"
+      appid: string
+      id: string
+      value: boolean | null
+    }
+  | {
+      op: "set_profile_field"
+      appid: string
+      field: "originalLaunchOptions" | "disableAutoManageLaunchOptions"
+      value: string | boolean | null
+    }
+  | { op: "upsert_launch_option"; option: LaunchOption }
+  | { op: "delete_launch_option"; id: string }
@@ -29,6 +29,7 @@ import { showDeleteLaunchOptionModal } from "../../../../components/delete-launc
 import { PluginProvider } from "../../../../components/plugin-provider"
 import { QueryClientProvider } from "@tanstack/react-query"
 import {
+  get_original_launch_options_backup,
   queryClient,
   useDeleteOriginalLaunchOptionsBackupMutation,
   useDeleteOriginalLaunchOptionsBackupsMutation,
@@ -375,14 +376,25 @@ function formatBackupDate(date: string): string {
   }).format(parsedDate)
 }
 
+const backupsPageSize = 20
+
 function LaunchOptionsBackupsModal({
   appid,
   onRestore,
 }: LaunchOptionsBackupsModalProps) {
-  const backupsQuery = useGetOriginalLaunchOptionsBackupsQuery(appid)
+  const [limit, setLimit] = useState(backupsPageSize)
+  const backupsQuery = useGetOriginalLaunchOptionsBackupsQuery(appid, limit)
   const deleteBackupMutation = useDeleteOriginalLaunchOptionsBackupMutation()
   const backups = backupsQuery.data ?? []
 
+  // Only the preview is listed, the full command is fetched once selected
+  const withBackupCommand =
+    (backupId: string, callback: (command: string) => void) => () => {
+      get_original_launch_options_backup(appid, backupId).then((backup) => {
+        if (backup) callback(backup.command)
+      })
+    }
+
   const confirmDeleteBackup = (backupId: string, date: string) => {
     showModal(
       <ConfirmModal
@@ -409,9 +421,13 @@ function LaunchOptionsBackupsModal({
     <Focusable style={{ maxHeight: "55vh", overflowY: "auto" }}>
       {backups.map((backup) => (
         <Field
-          key={`${backup.date}:${backup.command}`}
+          key={backup.id}
           label={formatBackupDate(backup.date)}
-          description={backup.command || "(empy)"}
+          description={
+            new TextEncoder().encode(backup.preview).length < backup.size
+              ? `${backup.preview}…`
+              : backup.preview || "(empy)"
+          }
           childrenLayout={"inline"}
         >
           <BackupActionButton
@@ -419,13 +435,13 @@ function LaunchOptionsBackupsModal({
             actions={[
               {
                 label: "Restore",
-                onSelected: () => onRestore(backup.command),
+                onSelected: withBackupCommand(backup.id, onRestore),
               },
               {
                 label: "Copy to clipboard",
-                onSelected: () => {
-                  copyTextToClipboard(backup.command)
-                },
+                onSelected: withBackupCommand(backup.id, (command) => {
+                  copyTextToClipboard(command)
+                }),
               },
               {
                 label: "Delete",
@@ -436,6 +452,14 @@ function LaunchOptionsBackupsModal({
           />
         </Field>
       ))}
+      {backups.length === limit && (
+        <ButtonItem
+          layout="below"
+          onClick={() => setLimit((current) => current + backupsPageSize)}
+        >
+          Show older backups
+        </ButtonItem>
+      )}
     </Focusable>
   )
 }
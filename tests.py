@@ -13,10 +13,16 @@ if hasattr(sys.stdout, "reconfigure"):
 # Add current directory to path to import run.py
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import json
+import shlex
+import subprocess
 from unittest.mock import patch
-from run import parse_launch_option, get_final_args_details
+from run import parse_launch_option, get_final_args_details, resolve_launch_commands, split_launch_option
+
+TESTED_COMMANDS = []
 
 def test_case(name, raw_command, expected=None):
+    TESTED_COMMANDS.append(raw_command)
     print(f"\n{'='*60}")
     print(f"Test: {name}")
     print(f"{'='*60}")
@@ -44,6 +50,34 @@ def test_case(name, raw_command, expected=None):
 
     return result
 
+# Stands in for the module Decky Loader provides to plugins
+FAKE_DECKY_MODULE = """
+import logging
+DECKY_PLUGIN_DIR = {plugin_dir!r}
+logger = logging.getLogger("decky")
+emitted = []
+async def emit(event, *args):
+    emitted.append(event)
+"""
+
+
+def run_plugin_code(home, code):
+    """
+    Run code importing main.py in a new process whose home is `home`, so the
+    plugin's paths point into it. The code prints its result as JSON.
+    """
+    plugin_dir = os.path.dirname(os.path.abspath(__file__))
+    decky_dir = os.path.join(home, "decky")
+    os.makedirs(decky_dir, exist_ok=True)
+    with open(os.path.join(decky_dir, "decky.py"), "w", encoding="utf-8") as f:
+        f.write(FAKE_DECKY_MODULE.format(plugin_dir=plugin_dir))
+    env = dict(os.environ, HOME=home, PYTHONPATH=os.pathsep.join([decky_dir, plugin_dir]))
+    process = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.splitlines()[-1])
+
+
 if __name__ == "__main__":
     print("Launch Option Parser Tests")
     print("="*60)
@@ -290,6 +324,45 @@ if __name__ == "__main__":
         }
     )
 
+    # =========================================================
+    # Tokenizer tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Tokenizer Tests (differential against shlex.split)")
+    print("="*60)
+
+    def split_or_error(split, raw_command):
+        try:
+            return split(raw_command)
+        except ValueError as e:
+            return f"ValueError: {e}"
+
+    tokenizer_commands = TESTED_COMMANDS + [
+        "",
+        "''",
+        'x "" y',
+        'a"b c"d',
+        "'single \\ quoted' \"double \\\" quoted\"",
+        '"keep \\n escapes"',
+        "escaped\\ space\ttab\nnewline",
+        "MANGOHUD_CONFIG='cpu_temp,gpu_temp' %command% #not-a-comment",
+        '"unterminated',
+        "'unterminated",
+        "trailing\\",
+        '"trailing\\',
+    ]
+    tokenizer_failures = [
+        raw_command
+        for raw_command in tokenizer_commands
+        if split_or_error(split_launch_option, raw_command) != split_or_error(shlex.split, raw_command)
+    ]
+    print(f"Compared {len(tokenizer_commands)} commands")
+    for raw_command in tokenizer_failures:
+        print(f"Input:    {raw_command!r}")
+        print(f"Result:   {split_or_error(split_launch_option, raw_command)}")
+        print(f"Expected: {split_or_error(shlex.split, raw_command)}")
+    print(f"\n{'✓ PASS' if not tokenizer_failures else '✗ FAIL'}")
+
     # =========================================================
     # Priority ordering tests
     # =========================================================
@@ -339,7 +412,7 @@ if __name__ == "__main__":
     original_argv = sys.argv
     sys.argv = ["run.py", "/path/to/game"]
 
-    with patch("run.shutil.which", return_value="/usr/bin/fake"):
+    with patch("shutil.which", return_value="/usr/bin/fake"):
 
         # Test A: Higher priority prefix comes first (leftmost)
         print(f"\n{'='*60}")
@@ -529,9 +602,1137 @@ if __name__ == "__main__":
         print(f"Expected: {expected_i}")
         print(f"\n{'PASS' if match_i else 'FAIL'}")
 
+        # Test J: Batch resolution matches per-app resolution without touching os.environ
+        print(f"\n{'='*60}")
+        print("Test: Batch resolution - matches per-app resolution")
+        print(f"{'='*60}")
+        settings_j = make_settings(
+            [
+                make_opt("hud", "DXVK_HUD=fps mangohud %command%", priority=1),
+                make_opt("args", "%command% -novid", priority=0),
+                dict(make_opt("local", "gamescope -f -- %command%", priority=5), enableGlobally=False),
+            ],
+            state={"local": True, "args": False},
+            original_launch_options="FOO=1 %command% -console",
+        )
+        environ_before_j = dict(os.environ)
+        batch_j = resolve_launch_commands(settings_j, ["123", "456"], ["/path/to/game"])
+        untouched_environ_j = dict(os.environ) == environ_before_j
+        with patch.dict(os.environ):
+            expected_j = {
+                appid: dict(zip(("args", "env_vars"), get_final_args_details(settings_j, appid)))
+                for appid in ["123", "456"]
+            }
+        match_j = batch_j == expected_j and untouched_environ_j
+        print(f"Result:   {batch_j}")
+        print(f"Expected: {expected_j}")
+        print(f"\n{'PASS' if match_j else 'FAIL'}")
+
+        # Test Q: Parsed forms stored with the options give the same commands, stale ones are ignored
+        print(f"\n{'='*60}")
+        print("Test: Stored parsed options - same result as parsing")
+        print(f"{'='*60}")
+        from run import add_parsed_launch_option, compile_launch_option
+        settings_q = make_settings(
+            [
+                make_opt("lsfg", "LSFG=1 ~/lsfg %command% -dx11", priority=1),
+                make_opt("hud", "DXVK_HUD=fps %command%", priority=0),
+            ],
+            state={},
+        )
+        parsed_q = dict(settings_q, launchOptions=[add_parsed_launch_option(opt) for opt in settings_q["launchOptions"]])
+        # A parsed form left over from a previous command of the option
+        parsed_q["launchOptions"][1] = dict(
+            parsed_q["launchOptions"][1],
+            parsed={"on": compile_launch_option("DXVK_HUD=full %command% -stale")},
+        )
+        result_q = resolve_launch_commands(parsed_q, ["123"], ["/path/to/game"])
+        expected_q = resolve_launch_commands(settings_q, ["123"], ["/path/to/game"])
+        stored_q = parsed_q["launchOptions"][0]["parsed"]["on"]
+        match_q = (
+            result_q == expected_q
+            and stored_q["prefix"] == [os.path.expanduser("~/lsfg")]
+            and stored_q["env_vars"] == [("LSFG", "1")]
+        )
+        print(f"Result:   {result_q}")
+        print(f"Expected: {expected_q}")
+        print(f"\n{'✓ PASS' if match_q else '✗ FAIL'}")
+
     # Restore sys.argv
     sys.argv = original_argv
 
+    # =========================================================
+    # Launch journal tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Launch Journal Tests")
+    print("="*60)
+
+    import tempfile
+    import run
+
+    with tempfile.TemporaryDirectory() as journal_dir:
+        journal_path = os.path.join(journal_dir, "launches")
+        with patch("run.LAUNCH_JOURNAL_PATH", journal_path):
+            # Test K: Records are read back most recent first, filtered by appid
+            print(f"\n{'='*60}")
+            print("Test: Launch journal - query by appid and offset")
+            print(f"{'='*60}")
+            for i in range(5):
+                run.write_launch_record({"appid": str(100 + i % 2), "args": [f"launch-{i}"]})
+            result_k = [record["args"] for record in run.read_launch_records("101", 0, 10)]
+            result_k.append(run.read_launch_records(None, 1, 1)[0]["args"])
+            expected_k = [["launch-3"], ["launch-1"], ["launch-3"]]
+            match_k = result_k == expected_k
+            print(f"Result:   {result_k}")
+            print(f"Expected: {expected_k}")
+            print(f"\n{'✓ PASS' if match_k else '✗ FAIL'}")
+
+            # Test L: The journal stays bounded and keeps the most recent launches
+            print(f"\n{'='*60}")
+            print("Test: Launch journal - bounded to the last launches")
+            print(f"{'='*60}")
+            for i in range(2 * run.MAX_LAUNCH_RECORDS):
+                run.write_launch_record({"appid": "200", "args": [f"launch-{i}"], "env_vars": {"X": "y" * 5000}})
+            run.write_launch_record({"appid": "200", "args": ["launch-last"]})
+            records_l = run.read_launch_records(None, 0, 3 * run.MAX_LAUNCH_RECORDS)
+            slot_sizes_l = {
+                os.path.getsize(os.path.join(journal_path, name)) for name in os.listdir(journal_path) if name != "head"
+            }
+            result_l = (
+                len(os.listdir(journal_path)),
+                slot_sizes_l,
+                len(records_l),
+                records_l[0]["args"],
+                records_l[1].get("truncated"),
+            )
+            expected_l = (run.MAX_LAUNCH_RECORDS + 1, {run.LAUNCH_RECORD_SIZE}, run.MAX_LAUNCH_RECORDS, ["launch-last"], True)
+            match_l = result_l == expected_l
+            print(f"Result:   {result_l}")
+            print(f"Expected: {expected_l}")
+            print(f"\n{'✓ PASS' if match_l else '✗ FAIL'}")
+
+            # Test P: A cursor returns only the records written since, and resets once they were overwritten
+            print(f"\n{'='*60}")
+            print("Test: Launch journal - read records since a cursor")
+            print(f"{'='*60}")
+            tail_p = run.read_launch_records_since(None, None, 2)
+            run.write_launch_record({"appid": "300", "args": ["new-1"]})
+            run.write_launch_record({"appid": "301", "args": ["new-2"]})
+            since_p = run.read_launch_records_since(tail_p["cursor"], "300")
+            empty_p = run.read_launch_records_since(since_p["cursor"])
+            for i in range(run.MAX_LAUNCH_RECORDS + 1):
+                run.write_launch_record({"appid": "302", "args": [f"overwriting-{i}"]})
+            compacted_p = run.read_launch_records_since(empty_p["cursor"], None, 1)
+            result_p = (
+                [record["appid"] for record in tail_p["records"]],
+                tail_p["reset"],
+                [record["args"] for record in since_p["records"]],
+                since_p["reset"],
+                empty_p["records"],
+                [record["args"] for record in compacted_p["records"]],
+                compacted_p["reset"],
+            )
+            expected_p = (
+                ["200", "200"],
+                True,
+                [["new-1"]],
+                False,
+                [],
+                [[f"overwriting-{run.MAX_LAUNCH_RECORDS}"]],
+                True,
+            )
+            match_p = result_p == expected_p
+            print(f"Result:   {result_p}")
+            print(f"Expected: {expected_p}")
+            print(f"\n{'✓ PASS' if match_p else '✗ FAIL'}")
+
+    # Test X: The plugin tells the frontend about launches written by either launcher
+    print(f"\n{'='*60}")
+    print("Test: Launch journal - launches reported by the plugin's file watcher")
+    print(f"{'='*60}")
+    code_x = """
+import asyncio, json, os, decky, main, run
+
+async def check():
+    plugin = main.Plugin()
+    plugin.loop = asyncio.get_running_loop()
+    os.makedirs(main.LAUNCH_JOURNAL_PATH)
+    plugin._start_file_watcher()
+    try:
+        run.write_launch_record({"appid": "1", "args": ["first"]})
+        await asyncio.sleep(0.5)
+    finally:
+        plugin._stop_file_watcher()
+    return decky.emitted
+
+print(json.dumps(asyncio.run(check())))
+"""
+    with tempfile.TemporaryDirectory() as home_x:
+        result_x = run_plugin_code(home_x, code_x)
+    expected_x = ["launch_recorded"]
+    match_x = result_x == expected_x
+    print(f"Result:   {result_x}")
+    print(f"Expected: {expected_x}")
+    print(f"\n{'✓ PASS' if match_x else '✗ FAIL'}")
+
+    # Test AH: A launch through run.py records how long each stage took, its journal write included
+    print(f"\n{'='*60}")
+    print("Test: Launch journal - stage timings of a run.py launch")
+    print(f"{'='*60}")
+    with tempfile.TemporaryDirectory() as home_ah:
+        subprocess.run(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "run.py"), "true"],
+            env=dict(os.environ, HOME=home_ah, SteamAppId="123"),
+            check=True,
+        )
+        with patch("run.LAUNCH_JOURNAL_PATH", os.path.join(home_ah, ".dlo", "launches")):
+            timings_ah = run.read_launch_records(None, 0, 1)[0]["timings"]
+    result_ah = (sorted(timings_ah), all(isinstance(value, int) for value in timings_ah.values()), timings_ah["journal"] > 0)
+    expected_ah = (["journal", "prefixes", "record", "resolver", "settings"], True, True)
+    match_ah = result_ah == expected_ah
+    print(f"Result:   {result_ah}")
+    print(f"Expected: {expected_ah}")
+    print(f"\n{'✓ PASS' if match_ah else '✗ FAIL'}")
+
+    # =========================================================
+    # Settings journal tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Settings Journal Tests")
+    print("="*60)
+
+    import json
+
+    with tempfile.TemporaryDirectory() as settings_dir:
+        settings_path = os.path.join(settings_dir, "settings.json")
+        settings_journal_path = os.path.join(settings_dir, "settings.journal")
+        with patch("run.SETTINGS_PATH", settings_path), patch("run.SETTINGS_JOURNAL_PATH", settings_journal_path):
+            # Test M: Journaled patches are replayed on top of the settings snapshot they were written against
+            print(f"\n{'='*60}")
+            print("Test: Settings journal - replay patches")
+            print(f"{'='*60}")
+            with open(settings_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "profiles": {"123": {"state": {"a": True}, "originalLaunchOptions": ""}},
+                    "launchOptions": [{"id": "a", "on": "A=1 %command%"}],
+                    "generation": 3,
+                }, f)
+            ops_m = [
+                {"op": "set_profile_state", "appid": "123", "id": "a", "value": None},
+                {"op": "set_profile_state", "appid": "456", "id": "a", "value": False},
+                {"op": "upsert_launch_option", "option": {"id": "b", "on": "%command% -b"}},
+            ]
+            signature_m = run.get_settings_signature()
+            with open(settings_journal_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"settings": 2, "file": signature_m, "ops": [{"op": "delete_launch_option", "id": "a"}]}) + "\n")
+                f.write(json.dumps({"settings": 3, "file": signature_m, "ops": ops_m}) + "\n")
+                f.write('{"settings": [')
+            settings_m = run.get_settings()
+            # Replaying the patch again changes nothing
+            affected_m = run.apply_settings_patch(json.loads(json.dumps(settings_m)), ops_m[:2])
+            # A hand edit keeps the generation but not the file, the journal no longer applies
+            with open(settings_path, "w", encoding="utf-8") as f:
+                json.dump({"profiles": {}, "launchOptions": [{"id": "c", "on": "%command%"}], "generation": 3}, f)
+            result_m = (
+                settings_m["profiles"],
+                [item["id"] for item in settings_m["launchOptions"]],
+                sorted(affected_m),
+                run.apply_settings_patch(settings_m, ops_m),
+                run.get_settings(),
+            )
+            expected_m = (
+                {
+                    "123": {"state": {}, "originalLaunchOptions": ""},
+                    "456": {"state": {"a": False}, "originalLaunchOptions": ""},
+                },
+                ["b", "a"],
+                ["123", "456"],
+                None,
+                {"profiles": {}, "launchOptions": [{"id": "c", "on": "%command%"}], "generation": 3},
+            )
+            match_m = result_m == expected_m
+            print(f"Result:   {result_m}")
+            print(f"Expected: {expected_m}")
+            print(f"\n{'✓ PASS' if match_m else '✗ FAIL'}")
+
+        # Test N: The SQLite store applies patches like the JSON settings do
+        print(f"\n{'='*60}")
+        print("Test: SQLite settings store - patches match the JSON settings")
+        print(f"{'='*60}")
+        from settings_store import SettingsStore
+
+        settings_n = {
+            "profiles": {
+                "123": {"state": {"a": True, "b": False}, "originalLaunchOptions": "FOO=1 %command%"},
+                "456": {"state": {}, "originalLaunchOptions": "", "disableAutoManageLaunchOptions": True},
+            },
+            "launchOptions": [{"id": "a", "on": "A=1 %command%"}, {"id": "b", "on": "%command% -b"}],
+        }
+        ops_n = [
+            {"op": "set_profile_state", "appid": "789", "id": "a", "value": True},
+            {"op": "set_profile_field", "appid": "456", "field": "disableAutoManageLaunchOptions", "value": None},
+            {"op": "upsert_launch_option", "option": {"id": "c", "on": "mangohud %command%"}},
+            {"op": "upsert_launch_option", "option": {"id": "a", "on": "A=2 %command%"}},
+            {"op": "delete_launch_option", "id": "b"},
+        ]
+        original_n = json.loads(json.dumps(settings_n))
+        store_n = SettingsStore(os.path.join(settings_dir, "settings.db"))
+        try:
+            store_n.write_settings(settings_n)
+            round_trip_n = store_n.read_settings()
+            generation_n = store_n.apply_patch(ops_n)
+            run.apply_settings_patch(settings_n, ops_n)
+            result_n = (
+                {key: value for key, value in round_trip_n.items() if key != "generation"},
+                store_n.read_settings(),
+                store_n.read_app_settings("123")["profiles"],
+            )
+        finally:
+            store_n.close()
+        expected_n = (
+            original_n,
+            dict(settings_n, generation=generation_n),
+            {"123": settings_n["profiles"]["123"]},
+        )
+        match_n = result_n == expected_n and generation_n == 2
+        print(f"Result:   {result_n}")
+        print(f"Expected: {expected_n}")
+        print(f"\n{'✓ PASS' if match_n else '✗ FAIL'}")
+
+    # =========================================================
+    # Resolver tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Resolver Tests")
+    print("="*60)
+
+    import socket
+    import threading
+    import time
+
+    with tempfile.TemporaryDirectory() as resolver_dir:
+        socket_path = os.path.join(resolver_dir, "resolver.sock")
+        with patch("run.RESOLVER_SOCKET_PATH", socket_path):
+            # Test R: The resolver's answer is used, and a silent resolver falls back within the timeout
+            print(f"\n{'='*60}")
+            print("Test: Resolver - answer or fall back")
+            print(f"{'='*60}")
+            missing_r = run.resolve_with_resolver("10", ["/path/to/game"])
+            server_r = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server_r.bind(socket_path)
+            server_r.listen()
+            requests_r = []
+
+            def serve_r(reply):
+                connection, _ = server_r.accept()
+                with connection:
+                    requests_r.append(json.loads(connection.makefile().readline()))
+                    if reply:
+                        connection.sendall(b'{"args":["gamemoderun","/path/to/game"],"env_vars":{"A":"1"}}\n')
+                    else:
+                        time.sleep(3 * run.RESOLVER_TIMEOUT)
+
+            try:
+                thread_r = threading.Thread(target=serve_r, args=(True,))
+                thread_r.start()
+                answered_r = run.resolve_with_resolver("10", ["/path/to/game"])
+                thread_r.join()
+                thread_r = threading.Thread(target=serve_r, args=(False,))
+                thread_r.start()
+                start_r = time.monotonic()
+                silent_r = run.resolve_with_resolver("10", ["/path/to/game"])
+                fell_back_in_time_r = time.monotonic() - start_r < 2 * run.RESOLVER_TIMEOUT
+                thread_r.join()
+            finally:
+                server_r.close()
+            result_r = (
+                missing_r,
+                answered_r,
+                [(request["appid"], request["args"]) for request in requests_r],
+                silent_r,
+                fell_back_in_time_r,
+            )
+            expected_r = (
+                None,
+                {"args": ["gamemoderun", "/path/to/game"], "env_vars": {"A": "1"}},
+                [("10", ["/path/to/game"])] * 2,
+                None,
+                True,
+            )
+            match_r = result_r == expected_r
+            print(f"Result:   {result_r}")
+            print(f"Expected: {expected_r}")
+            print(f"\n{'✓ PASS' if match_r else '✗ FAIL'}")
+
+    # =========================================================
+    # Executable cache tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Executable Cache Tests")
+    print("="*60)
+
+    # Test Z: Lookups are cached per PATH until a PATH directory changes, for the last few PATH values
+    print(f"\n{'='*60}")
+    print("Test: Executable cache - hits, invalidation and eviction")
+    print(f"{'='*60}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bin_z = os.path.join(cache_dir, "bin")
+        os.makedirs(bin_z)
+
+        def add_executable_z(name):
+            with open(os.path.join(bin_z, name), "w", encoding="utf-8") as f:
+                f.write("#!/bin/sh\n")
+            os.chmod(os.path.join(bin_z, name), 0o755)
+
+        add_executable_z("tool")
+        with patch("run.EXECUTABLE_CACHE_PATH", os.path.join(cache_dir, "executables.json")):
+            resolver_z = run.ExecutableResolver(run.load_executable_cache(), bin_z)
+            missed_z = (resolver_z.which("tool"), resolver_z.which("missing"), resolver_z.changed)
+            resolver_z.store()
+            run.save_executable_cache(resolver_z.cache)
+
+            # Answered from the cache, without looking anything up
+            with patch("shutil.which", side_effect=AssertionError("looked up")):
+                resolver_z = run.ExecutableResolver(run.load_executable_cache(), bin_z)
+                hit_z = (resolver_z.which("tool"), resolver_z.which("missing"), resolver_z.changed)
+
+            # Adding an executable changes the directory, the section is dropped
+            time.sleep(0.01)
+            add_executable_z("missing")
+            resolver_z = run.ExecutableResolver(run.load_executable_cache(), bin_z)
+            invalidated_z = (resolver_z.which("missing"), resolver_z.changed)
+
+            cache_z = {}
+            for i in range(run.MAX_EXECUTABLE_CACHE_PATHS + 2):
+                run.ExecutableResolver(cache_z, f"{bin_z}{os.pathsep}/path-{i}").store()
+            evicted_z = [search_path.rsplit("-", 1)[1] for search_path in cache_z]
+    result_z = (missed_z, hit_z, invalidated_z, evicted_z)
+    expected_z = (
+        (os.path.join(bin_z, "tool"), None, True),
+        (os.path.join(bin_z, "tool"), None, False),
+        (os.path.join(bin_z, "missing"), True),
+        [str(i) for i in range(2, run.MAX_EXECUTABLE_CACHE_PATHS + 2)],
+    )
+    match_z = result_z == expected_z
+    print(f"Result:   {result_z}")
+    print(f"Expected: {expected_z}")
+    print(f"\n{'✓ PASS' if match_z else '✗ FAIL'}")
+
+    # =========================================================
+    # Startup tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Startup Tests")
+    print("="*60)
+
+    import subprocess
+
+    # Time importing run.py may add to the launcher's interpreter startup, as
+    # a multiple of starting the bare interpreter with the same flags, so the
+    # budget holds on slower machines. About 1.4 when measured, most of it
+    # importing json.
+    RUN_IMPORT_TIME_BUDGET = 3
+    # Modules only imported by the launches that need them
+    LAZY_MODULES = {"datetime", "pathlib", "shutil", "socket", "sqlite3", "settings_store"}
+
+    # Test S: Importing run.py stays within its import time budget, without the lazy modules
+    print(f"\n{'='*60}")
+    print("Test: Startup - run.py import time budget")
+    print(f"{'='*60}")
+    import_run_s = f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); import run"
+    startup_times_s = []
+    import_times_s = []
+    for _ in range(5):
+        for code, times in (("pass", startup_times_s), (import_run_s, import_times_s)):
+            start_s = time.perf_counter()
+            subprocess.run([sys.executable, "-E", "-s", "-S", "-c", code], check=True)
+            times.append(time.perf_counter() - start_s)
+    process_s = subprocess.run(
+        [sys.executable, "-E", "-s", "-S", "-X", "importtime", "-c", import_run_s],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported_s = set()
+    for line in process_s.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            imported_s.add(line.split("|")[2].strip())
+    # The fastest runs are the least disturbed by the rest of the machine
+    import_cost_s = (min(import_times_s) - min(startup_times_s)) / min(startup_times_s)
+    result_s = (import_cost_s <= RUN_IMPORT_TIME_BUDGET, sorted(LAZY_MODULES & imported_s))
+    expected_s = (True, [])
+    match_s = result_s == expected_s
+    print(f"Import cost: {import_cost_s:.2f}x the interpreter startup (budget {RUN_IMPORT_TIME_BUDGET}x)")
+    print(f"Result:   {result_s}")
+    print(f"Expected: {expected_s}")
+    print(f"\n{'✓ PASS' if match_s else '✗ FAIL'}")
+
+    # =========================================================
+    # localconfig.vdf tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("localconfig.vdf Tests")
+    print("="*60)
+
+    import io
+    from localconfig import iter_launch_options
+
+    # Test O: Launch options are read per app, across chunk boundaries and escapes
+    print(f"\n{'='*60}")
+    print("Test: localconfig.vdf - launch options of every app")
+    print(f"{'='*60}")
+    localconfig_o = """"UserLocalConfigStore"
+{
+	"Software"
+	{
+		"Valve"
+		{
+			"Steam"
+			{
+				"apps"
+				{
+					"10"
+					{
+						"LastPlayed"		"1700000000"
+						"LaunchOptions"		"WINEDLLOVERRIDES=\\"dinput8=n,b\\" %command% -novid"
+					}
+					// A comment
+					"20" { "cloud" { "LaunchOptions" "not an app" } "LaunchOptions" "" }
+					"30" { "launchoptions" "gamemoderun %command%" }
+				}
+				"LaunchOptions"		"not an app either"
+			}
+		}
+	}
+}
+"""
+    result_o = [
+        list(iter_launch_options(io.StringIO(localconfig_o))),
+        list(iter_launch_options(io.StringIO(localconfig_o), chunk_size=7)),
+    ]
+    expected_o = [[
+        ("10", 'WINEDLLOVERRIDES="dinput8=n,b" %command% -novid'),
+        ("20", ""),
+        ("30", "gamemoderun %command%"),
+    ]] * 2
+    match_o = result_o == expected_o
+    print(f"Result:   {result_o}")
+    print(f"Expected: {expected_o}")
+    print(f"\n{'✓ PASS' if match_o else '✗ FAIL'}")
+
+    # =========================================================
+    # Plugin settings tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Plugin Settings Tests")
+    print("="*60)
+
+    # Test AA: Settings are parsed again only when the files changed outside of the plugin
+    print(f"\n{'='*60}")
+    print("Test: Settings cache - parsed once per change of the files")
+    print(f"{'='*60}")
+    code_aa = """
+import json, main
+reads = []
+read_settings = main.read_settings
+def counting_read_settings():
+    reads.append(1)
+    return read_settings()
+main.read_settings = counting_read_settings
+
+plugin = main.Plugin()
+plugin._set_settings({"profiles": {"1": {"state": {}, "originalLaunchOptions": ""}}, "launchOptions": []})
+reads.clear()
+cached = plugin._read_settings() is plugin._read_settings()
+plugin._patch_settings([{"op": "set_profile_state", "appid": "1", "id": "a", "value": True}])
+patched = plugin._read_settings()["profiles"]["1"]["state"]
+reads_before_edit = len(reads)
+with open(main.SETTINGS_PATH, "w") as f:
+    json.dump({"profiles": {}, "launchOptions": [], "generation": 5}, f)
+edited = plugin._read_settings()
+plugin._read_settings()
+print(json.dumps([cached, patched, reads_before_edit, edited["profiles"], len(reads)]))
+"""
+    with tempfile.TemporaryDirectory() as home_aa:
+        result_aa = run_plugin_code(home_aa, code_aa)
+    expected_aa = [True, {"a": True}, 0, {}, 1]
+    match_aa = result_aa == expected_aa
+    print(f"Result:   {result_aa}")
+    print(f"Expected: {expected_aa}")
+    print(f"\n{'✓ PASS' if match_aa else '✗ FAIL'}")
+
+    # Test AB: A burst of set_settings calls is written once, with the latest settings
+    print(f"\n{'='*60}")
+    print("Test: Settings writes - a burst of set_settings is coalesced")
+    print(f"{'='*60}")
+    code_ab = """
+import asyncio, json, main
+plugin = main.Plugin()
+writes = []
+set_settings = plugin._set_settings
+def counting_set_settings(data):
+    writes.append(data["launchOptions"][0]["name"])
+    set_settings(data)
+plugin._set_settings = counting_set_settings
+
+def settings(name):
+    return {"profiles": {}, "launchOptions": [{"id": "a", "name": name, "on": "", "off": ""}]}
+
+async def main_():
+    calls = [asyncio.create_task(plugin.set_settings(settings(name))) for name in ("1", "2", "3")]
+    await asyncio.sleep(0)
+    pending = (await plugin.get_settings())["launchOptions"][0]["name"]
+    await asyncio.gather(*calls)
+    written = (await plugin.get_settings())["launchOptions"][0]["name"]
+    await plugin.set_settings(settings("4"))
+    await plugin.flush_writes()
+    return [writes, pending, written, main.read_settings()["launchOptions"][0]["name"]]
+print(json.dumps(asyncio.run(main_())))
+"""
+    with tempfile.TemporaryDirectory() as home_ab:
+        result_ab = run_plugin_code(home_ab, code_ab)
+    expected_ab = [["3", "4"], "3", "3", "4"]
+    match_ab = result_ab == expected_ab
+    print(f"Result:   {result_ab}")
+    print(f"Expected: {expected_ab}")
+    print(f"\n{'✓ PASS' if match_ab else '✗ FAIL'}")
+
+    # Test AC: The settings garbage collection keeps only state that changes how an app launches
+    print(f"\n{'='*60}")
+    print("Test: Settings garbage collection")
+    print(f"{'='*60}")
+    code_ac = """
+import asyncio, json, main
+plugin = main.Plugin()
+settings = {
+    "launchOptions": [
+        {"id": "a", "name": "A", "on": "A=1", "off": ""},
+        {"id": "b", "name": "B", "on": "B=1", "off": "", "enableGlobally": True},
+    ],
+    "profiles": {
+        "1": {"state": {"a": True, "b": True, "deleted": True}, "originalLaunchOptions": ""},
+        "2": {"state": {"a": False}, "originalLaunchOptions": ""},
+        "3": {"state": {}, "originalLaunchOptions": ""},
+        "4": {"state": {}, "originalLaunchOptions": "%command% -x"},
+    },
+}
+_, unknown_state, unknown_profiles = plugin._collect_settings_garbage(settings, None)
+plugin._set_settings(settings)
+plugin._get_plugin_managed_appids = lambda: {"2"}
+result = asyncio.run(plugin.compact_settings())
+profiles = main.read_settings()["profiles"]
+print(json.dumps([
+    [unknown_state, unknown_profiles],
+    [result["removed_state"], result["removed_profiles"], result["bytes_saved"] > 0],
+    sorted(profiles),
+    profiles["1"]["state"],
+    asyncio.run(plugin.compact_settings())["removed_state"],
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_ac:
+        result_ac = run_plugin_code(home_ac, code_ac)
+    expected_ac = [[3, 0], [3, 1, True], ["1", "2", "4"], {"a": True}, 0]
+    match_ac = result_ac == expected_ac
+    print(f"Result:   {result_ac}")
+    print(f"Expected: {expected_ac}")
+    print(f"\n{'✓ PASS' if match_ac else '✗ FAIL'}")
+
+    # Test AD: The settings journal is compacted once idle, and survives a hand edit of settings.json
+    print(f"\n{'='*60}")
+    print("Test: Settings journal - compacted when idle and after hand edits")
+    print(f"{'='*60}")
+    code_ad = """
+import asyncio, json, os, main
+
+def read_file():
+    with open(main.SETTINGS_PATH) as f:
+        return json.load(f)
+
+async def check():
+    plugin = main.Plugin()
+    plugin.loop = asyncio.get_running_loop()
+    main.SETTINGS_JOURNAL_COMPACTION_DELAY = 0.05
+    plugin._set_settings({"profiles": {}, "launchOptions": []})
+    await plugin.patch_settings([{"op": "set_profile_state", "appid": "1", "id": "a", "value": True}])
+    await asyncio.sleep(0.2)
+    await plugin.flush_writes()
+    idle = [os.path.exists(main.SETTINGS_JOURNAL_PATH), read_file()["profiles"]["1"]["state"]]
+
+    main.SETTINGS_JOURNAL_COMPACTION_DELAY = 60
+    plugin._start_file_watcher()
+    try:
+        await plugin.patch_settings([{"op": "upsert_launch_option", "option": {"id": "b", "on": "%command% -b"}}])
+        edited = read_file()
+        edited["profiles"]["2"] = {"state": {}, "originalLaunchOptions": "%command% -x"}
+        with open(main.SETTINGS_PATH, "w") as f:
+            json.dump(edited, f)
+        await asyncio.sleep(0.5)
+        await plugin.flush_writes()
+    finally:
+        plugin._stop_file_watcher()
+        await plugin._unload()
+    settings = read_file()
+    return idle + [
+        os.path.exists(main.SETTINGS_JOURNAL_PATH),
+        sorted(settings["profiles"]),
+        [option["id"] for option in settings["launchOptions"]],
+    ]
+
+print(json.dumps(asyncio.run(check())))
+"""
+    with tempfile.TemporaryDirectory() as home_ad:
+        result_ad = run_plugin_code(home_ad, code_ad)
+    expected_ad = [False, {"a": True}, False, ["1", "2"], ["b"]]
+    match_ad = result_ad == expected_ad
+    print(f"Result:   {result_ad}")
+    print(f"Expected: {expected_ad}")
+    print(f"\n{'✓ PASS' if match_ad else '✗ FAIL'}")
+
+    # Test AE: Plans of a patch are only used once all of them are written
+    print(f"\n{'='*60}")
+    print("Test: Launch plans - a patch's plans are invisible until written")
+    print(f"{'='*60}")
+    code_ae = """
+import json, main, run
+plugin = main.Plugin()
+plugin._set_settings({
+    "profiles": {"1": {"state": {}, "originalLaunchOptions": ""}},
+    "launchOptions": [{"id": "a", "name": "A", "on": "A=1 %command%", "off": ""}],
+})
+before = run.load_launch_plan("1") is not None
+write_launch_plan_file = plugin._write_launch_plan_file
+def failing_write(path, content):
+    if path.suffix == ".sh":
+        raise OSError("disk full")
+    write_launch_plan_file(path, content)
+plugin._write_launch_plan_file = failing_write
+plugin._patch_settings([{"op": "set_profile_state", "appid": "1", "id": "a", "value": True}])
+failed = run.load_launch_plan("1")
+plugin._write_launch_plan_file = write_launch_plan_file
+plugin._patch_settings([{"op": "set_profile_state", "appid": "1", "id": "a", "value": False}])
+plugin._patch_settings([{"op": "set_profile_state", "appid": "1", "id": "a", "value": True}])
+print(json.dumps([before, failed, run.load_launch_plan("1") is not None]))
+"""
+    with tempfile.TemporaryDirectory() as home_ae:
+        result_ae = run_plugin_code(home_ae, code_ae)
+    expected_ae = [True, None, True]
+    match_ae = result_ae == expected_ae
+    print(f"Result:   {result_ae}")
+    print(f"Expected: {expected_ae}")
+    print(f"\n{'✓ PASS' if match_ae else '✗ FAIL'}")
+
+    # Test AG: Launches never create the SQLite store, and fall back to the JSON settings without it
+    print(f"\n{'='*60}")
+    print("Test: SQLite settings store - opened read-only by launches")
+    print(f"{'='*60}")
+    code_ag = """
+import json, os, main, run
+plugin = main.Plugin()
+plugin._set_settings({"profiles": {"1": {"state": {}, "originalLaunchOptions": ""}}, "launchOptions": []})
+# Left empty, as if removed and recreated halfway by the plugin
+open(main.SETTINGS_DB_PATH, "w").close()
+print(json.dumps([
+    sorted(run.get_settings()["profiles"]),
+    sorted(run.get_app_settings("1")["profiles"]),
+    os.path.getsize(main.SETTINGS_DB_PATH),
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_ag:
+        result_ag = run_plugin_code(home_ag, code_ag)
+    expected_ag = [["1"], ["1"], 0]
+    match_ag = result_ag == expected_ag
+    print(f"Result:   {result_ag}")
+    print(f"Expected: {expected_ag}")
+    print(f"\n{'✓ PASS' if match_ag else '✗ FAIL'}")
+
+    # =========================================================
+    # Launcher script tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Launcher Script Tests")
+    print("="*60)
+
+    # Test T: ~/.dlo/run uses the shell plan, falls back to run.py when it is stale and to the bare command without an interpreter
+    print(f"\n{'='*60}")
+    print("Test: Launcher script - plans, stale plans and missing interpreter")
+    print(f"{'='*60}")
+    with tempfile.TemporaryDirectory() as home_t:
+        bin_t = os.path.join(home_t, "bin")
+        os.makedirs(bin_t)
+        stubs_t = {
+            "game": '#!/bin/bash\nprintf "%s|%s|%s\\n" "$FOO" "$WRAPPED" "$*"\n',
+            "wrapper": '#!/bin/bash\nWRAPPED=1 exec "$@"\n',
+        }
+        for name, content in stubs_t.items():
+            with open(os.path.join(bin_t, name), "w", encoding="utf-8") as f:
+                f.write(content)
+            os.chmod(os.path.join(bin_t, name), 0o755)
+        os.makedirs(os.path.join(home_t, ".dlo"))
+        settings_path_t = os.path.join(home_t, ".dlo", "settings.json")
+        with open(settings_path_t, "w", encoding="utf-8") as f:
+            # "select" is a shell keyword, not an executable, and is skipped
+            json.dump({
+                "profiles": {"123": {"state": {"a": True, "b": True}, "originalLaunchOptions": ""}},
+                "launchOptions": [
+                    dict(make_opt("a", "FOO=1 wrapper %command% -x"), enableGlobally=False),
+                    dict(make_opt("b", "select %command%"), enableGlobally=False),
+                ],
+            }, f)
+        run_plugin_code(home_t, "import asyncio, main; asyncio.run(main.Plugin().prepare()); print('null')")
+        launcher_t = os.path.join(home_t, ".dlo", "run")
+        env_t = dict(os.environ, HOME=home_t, STEAM_COMPAT_APP_ID="123", PATH=f"{bin_t}{os.pathsep}{os.environ['PATH']}")
+
+        def launch_t():
+            output = subprocess.run(
+                [launcher_t, os.path.join(bin_t, "game"), "arg"], env=env_t, capture_output=True, text=True
+            ).stdout.strip()
+            with patch("run.LAUNCH_JOURNAL_PATH", os.path.join(home_t, ".dlo", "launches")):
+                records = run.read_launch_records(None, 0, 1)
+            return output, records[0]["source"] if records else None
+
+        def set_python_t(python_path):
+            with open(launcher_t, encoding="utf-8") as f:
+                lines = f.read().splitlines(keepends=True)
+            with open(launcher_t, "w", encoding="utf-8") as f:
+                f.writelines(f"DLO_PYTHON={shlex.quote(python_path)}\n" if line.startswith("DLO_PYTHON=") else line for line in lines)
+
+        planned_t = launch_t()
+        # settings.json written after the plans were compiled
+        settings_stat_t = os.stat(settings_path_t)
+        os.utime(settings_path_t, (settings_stat_t.st_atime + 10, settings_stat_t.st_mtime + 10))
+        stale_t = launch_t()
+        set_python_t(settings_path_t)
+        not_executable_t = launch_t()
+        set_python_t(os.path.join(home_t, "missing", "python"))
+        missing_t = launch_t()
+    result_t = (planned_t, stale_t, not_executable_t[0], missing_t[0])
+    expected_t = (("1|1|arg -x", "shell"), ("1|1|arg -x", "python"), "||arg", "||arg")
+    match_t = result_t == expected_t
+    print(f"Result:   {result_t}")
+    print(f"Expected: {expected_t}")
+    print(f"\n{'✓ PASS' if match_t else '✗ FAIL'}")
+
+    # Test V: With the SQLite store, plans compiled against another generation of the store are not used
+    print(f"\n{'='*60}")
+    print("Test: Launcher script - plans of another SQLite store generation")
+    print(f"{'='*60}")
+    code_v = """
+import asyncio, json, os, subprocess, main, run
+from settings_store import SettingsStore
+game_path = os.path.join(os.path.expanduser("~"), "game")
+with open(game_path, "w") as f:
+    f.write('#!/bin/bash\\nprintf "%s|%s\\\\n" "$FOO" "$*"\\n')
+os.chmod(game_path, 0o755)
+plugin = main.Plugin()
+option = {"id": "a", "name": "a", "on": "FOO=1 %command%", "off": "", "enableGlobally": False}
+plugin._set_settings({"profiles": {"123": {"state": {"a": True}, "originalLaunchOptions": ""}}, "launchOptions": [option]})
+plugin._set_settings_store("sqlite")
+asyncio.run(plugin.prepare())
+
+def launch():
+    env = dict(os.environ, STEAM_COMPAT_APP_ID="123")
+    output = subprocess.run([main.FULL_SH_COMMAND_PATH, game_path, "arg"], env=env, capture_output=True, text=True)
+    return [output.stdout.strip(), run.read_launch_records(None, 0, 1)[0]["source"], run.load_launch_plan("123") is not None]
+
+compiled = launch()
+# Patches of other apps only recompile their plans
+plugin._patch_settings([{"op": "set_profile_state", "appid": "456", "id": "a", "value": True}])
+patched = launch()
+# Committed without the plans being compiled, as if the plugin stopped in between
+store = SettingsStore()
+store.apply_patch([{"op": "set_profile_state", "appid": "123", "id": "a", "value": False}])
+store.close()
+print(json.dumps([compiled, patched, launch()]))
+"""
+    with tempfile.TemporaryDirectory() as home_v:
+        result_v = run_plugin_code(home_v, code_v)
+    expected_v = [["1|arg", "shell", True], ["1|arg", "shell", True], ["|arg", "python", False]]
+    match_v = result_v == expected_v
+    print(f"Result:   {result_v}")
+    print(f"Expected: {expected_v}")
+    print(f"\n{'✓ PASS' if match_v else '✗ FAIL'}")
+
+    # Test W: Saving the settings only rewrites the plans that changed and removes leftover temporary files
+    print(f"\n{'='*60}")
+    print("Test: Launch plans - only changed plans are written")
+    print(f"{'='*60}")
+    code_w = """
+import json, os, main
+plugin = main.Plugin()
+options = [
+    {"id": "a", "name": "a", "on": "A=1 %command%", "off": "", "enableGlobally": False},
+    {"id": "b", "name": "b", "on": "B=1 %command%", "off": "", "enableGlobally": False},
+]
+profiles = {appid: {"state": {"a": True}, "originalLaunchOptions": ""} for appid in ("10", "11", "12")}
+plugin._set_settings({"profiles": profiles, "launchOptions": options})
+with open(os.path.join(main.PLANS_PATH, "10.json.tmp"), "w") as f:
+    f.write("{")
+
+def get_inodes():
+    return {name: os.stat(os.path.join(main.PLANS_PATH, name)).st_ino for name in os.listdir(main.PLANS_PATH)}
+
+before = get_inodes()
+plugin._set_settings({"profiles": dict(profiles, **{"11": {"state": {"b": True}, "originalLaunchOptions": ""}}), "launchOptions": options})
+after = get_inodes()
+# A new plugin instance compares the plans with the files
+main.Plugin()._compile_launch_plans(plugin._read_settings())
+print(json.dumps([
+    sorted(name for name in after if before.get(name) != after[name]),
+    sorted(set(before) - set(after)),
+    sorted(name for name, inode in get_inodes().items() if after[name] != inode),
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_w:
+        result_w = run_plugin_code(home_w, code_w)
+    expected_w = [["11.json", "11.sh", "generation"], ["10.json.tmp"], ["generation"]]
+    match_w = result_w == expected_w
+    print(f"Result:   {result_w}")
+    print(f"Expected: {expected_w}")
+    print(f"\n{'✓ PASS' if match_w else '✗ FAIL'}")
+
+    # =========================================================
+    # Backup tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("Backup Tests")
+    print("="*60)
+
+    # Test U: Legacy backups are all migrated, unreadable ones are kept, and retention only applies with a policy
+    print(f"\n{'='*60}")
+    print("Test: Backups - migration and retention")
+    print(f"{'='*60}")
+    code_u = """
+import json, os, main
+plugin = main.Plugin()
+folder_path = os.path.join(main.BACKUPS_PATH, "123")
+os.makedirs(folder_path)
+for day in range(1, 26):
+    with open(os.path.join(folder_path, f"2024-01-{day:02d}T00:00:00+00:00.txt"), "w") as f:
+        f.write(f"-day{day}")
+with open(os.path.join(folder_path, "not-a-date.txt"), "w") as f:
+    f.write("-kept")
+plugin._migrate_legacy_backups()
+migrated = [len(plugin._load_backup_index("123")), sorted(os.listdir(folder_path))]
+plugin._backup_original_launch_options("123", "-latest")
+plugin._compact_backups()
+before_policy = len(plugin._load_backup_index("123"))
+plugin._set_backup_policy({"keepLast": 3})
+compacted = plugin._compact_backups()
+print(json.dumps([
+    migrated,
+    before_policy,
+    [compacted["removed_backups"], compacted["removed_objects"]],
+    [backup["preview"] for backup in plugin._load_backup_index("123")],
+    len(os.listdir(main.BACKUP_OBJECTS_PATH)),
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_u:
+        result_u = run_plugin_code(home_u, code_u)
+    expected_u = [[25, ["not-a-date.txt"]], 26, [23, 23], ["-latest", "-day25", "-day24"], 3]
+    match_u = result_u == expected_u
+    print(f"Result:   {result_u}")
+    print(f"Expected: {expected_u}")
+    print(f"\n{'✓ PASS' if match_u else '✗ FAIL'}")
+
+    # Test AJ: Retention by age applies to legacy backups named after naive local times
+    print(f"\n{'='*60}")
+    print("Test: Backups - age retention of migrated backups")
+    print(f"{'='*60}")
+    code_aj = """
+import json, os, main
+from datetime import datetime, timedelta
+plugin = main.Plugin()
+folder_path = os.path.join(main.BACKUPS_PATH, "456")
+os.makedirs(folder_path)
+recent = (datetime.now() - timedelta(days=1)).isoformat()
+for date, command in (("2020-01-01T00:00:00", "-old"), (recent, "-recent")):
+    with open(os.path.join(folder_path, f"{date}.txt"), "w") as f:
+        f.write(command)
+plugin._migrate_legacy_backups()
+# Migrated before the dates were normalized
+backups = plugin._load_backup_index("456")
+backups.append(plugin._get_backup_entry("older", "2019-01-01T00:00:00", "-older", backups[0]["hash"]))
+plugin._save_backup_index("456", backups)
+plugin._backup_original_launch_options("456", "-latest")
+try:
+    plugin._set_backup_policy({"keepLast": 0})
+    rejected = False
+except ValueError:
+    rejected = True
+plugin._set_backup_policy({"maxAgeDays": 30})
+compacted = plugin._compact_backups()
+print(json.dumps([
+    rejected,
+    compacted["removed_backups"],
+    [backup["preview"] for backup in plugin._load_backup_index("456")],
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_aj:
+        result_aj = run_plugin_code(home_aj, code_aj)
+    expected_aj = [True, 2, ["-latest", "-recent"]]
+    match_aj = result_aj == expected_aj
+    print(f"Result:   {result_aj}")
+    print(f"Expected: {expected_aj}")
+    print(f"\n{'✓ PASS' if match_aj else '✗ FAIL'}")
+
+    # Test AK: The resolver socket can only be reached by the user, even while it is created
+    print(f"\n{'='*60}")
+    print("Test: Resolver - socket permissions")
+    print(f"{'='*60}")
+    code_ak = """
+import asyncio, json, os, stat, main
+plugin = main.Plugin()
+os.makedirs(main.RESOLVER_FOLDER_PATH, mode=0o755)
+os.umask(0o022)
+async def start():
+    await plugin._start_resolver()
+    modes = [
+        oct(stat.S_IMODE(os.stat(main.RESOLVER_FOLDER_PATH).st_mode)),
+        oct(stat.S_IMODE(os.stat(main.RESOLVER_SOCKET_PATH).st_mode)),
+    ]
+    await plugin._stop_resolver()
+    return modes
+print(json.dumps(asyncio.run(start())))
+"""
+    with tempfile.TemporaryDirectory() as home_ak:
+        result_ak = run_plugin_code(home_ak, code_ak)
+    expected_ak = ["0o700", "0o600"]
+    match_ak = result_ak == expected_ak
+    print(f"Result:   {result_ak}")
+    print(f"Expected: {expected_ak}")
+    print(f"\n{'✓ PASS' if match_ak else '✗ FAIL'}")
+
+    # Test AI: Malformed items of a bulk backup call fail alone
+    print(f"\n{'='*60}")
+    print("Test: Backups - malformed bulk items")
+    print(f"{'='*60}")
+    code_ai = """
+import asyncio, json, main
+plugin = main.Plugin()
+plugin._set_settings({"profiles": {}, "launchOptions": []})
+backed_up = asyncio.run(plugin.backup_original_launch_options_for_apps([["1", "%command% -a"], ["2"], 3]))
+restored = asyncio.run(plugin.restore_original_launch_options_for_apps(["1", ["1"], None]))
+print(json.dumps([
+    [(result["appid"], result["ok"]) for result in backed_up],
+    [(result["appid"], result["ok"]) for result in restored],
+    main.read_settings()["profiles"]["1"]["originalLaunchOptions"],
+]))
+"""
+    with tempfile.TemporaryDirectory() as home_ai:
+        result_ai = run_plugin_code(home_ai, code_ai)
+    expected_ai = [
+        [["1", True], ["2", False], ["3", False]],
+        [["1", True], ["1", False], ["None", False]],
+        "%command% -a",
+    ]
+    match_ai = result_ai == expected_ai
+    print(f"Result:   {result_ai}")
+    print(f"Expected: {expected_ai}")
+    print(f"\n{'✓ PASS' if match_ai else '✗ FAIL'}")
+
+    # =========================================================
+    # File watcher tests
+    # =========================================================
+    print("\n" + "="*60)
+    print("File Watcher Tests")
+    print("="*60)
+
+    # Test Y: Settings written by the plugin are not reported back, other changes are
+    print(f"\n{'='*60}")
+    print("Test: File watcher - the plugin's own settings writes are ignored")
+    print(f"{'='*60}")
+    code_y = """
+import asyncio, json, decky, main
+from settings_store import SettingsStore
+
+async def wait_for_events():
+    await asyncio.sleep(0.5)
+    events, decky.emitted[:] = list(decky.emitted), []
+    return events
+
+async def check():
+    plugin = main.Plugin()
+    plugin.loop = asyncio.get_running_loop()
+    settings = {"profiles": {"1": {"state": {}, "originalLaunchOptions": ""}}, "launchOptions": []}
+    await plugin.set_settings(settings)
+    plugin._start_file_watcher()
+    results = []
+    try:
+        await plugin.set_settings(settings)
+        await plugin.set_profile_state("1", "a", True)
+        results.append(await wait_for_events())
+        with open(main.SETTINGS_PATH, "w") as f:
+            json.dump(settings, f)
+        results.append(await wait_for_events())
+        await plugin.set_settings_store("sqlite")
+        await plugin.set_profile_state("1", "a", False)
+        results.append(await wait_for_events())
+        store = SettingsStore()
+        store.apply_patch([{"op": "set_profile_state", "appid": "1", "id": "a", "value": True}])
+        store.close()
+        results.append(await wait_for_events())
+    finally:
+        plugin._stop_file_watcher()
+    return results
+
+print(json.dumps(asyncio.run(check())))
+"""
+    with tempfile.TemporaryDirectory() as home_y:
+        result_y = run_plugin_code(home_y, code_y)
+    expected_y = [[], ["settings_changed"], [], ["settings_changed"]]
+    match_y = result_y == expected_y
+    print(f"Result:   {result_y}")
+    print(f"Expected: {expected_y}")
+    print(f"\n{'✓ PASS' if match_y else '✗ FAIL'}")
+
+    # Test AF: Steam's userdata is watched for new users and localconfig.vdf changes
+    print(f"\n{'='*60}")
+    print("Test: File watcher - Steam caches are dropped when userdata changes")
+    print(f"{'='*60}")
+    code_af = """
+import asyncio, json, os, main
+
+def write_localconfig(userid, appids):
+    config_path = os.path.join(os.path.expanduser("~"), ".steam", "steam", "userdata", userid, "config")
+    os.makedirs(config_path, exist_ok=True)
+    apps = "".join(f'"{appid}" {{ "LaunchOptions" "{main.COMMAND}" }}' for appid in appids)
+    with open(os.path.join(config_path, "localconfig.vdf"), "w") as f:
+        f.write(f'"UserLocalConfigStore" {{ "Software" {{ "Valve" {{ "Steam" {{ "apps" {{ {apps} }} }} }} }} }}')
+
+async def check():
+    plugin = main.Plugin()
+    plugin.loop = asyncio.get_running_loop()
+    write_localconfig("1", ["10"])
+    plugin._start_file_watcher()
+    results = []
+    try:
+        results.append(sorted(plugin._get_plugin_managed_appids()))
+        results.append(plugin._get_steam_users() is plugin._get_steam_users())
+        write_localconfig("1", ["10", "20"])
+        await asyncio.sleep(0.5)
+        results.append(sorted(plugin._get_plugin_managed_appids()))
+        os.utime(os.path.join(os.path.expanduser("~"), ".steam", "steam", "userdata", "1"), (1, 1))
+        write_localconfig("2", ["30"])
+        await asyncio.sleep(0.5)
+        results.append([user["id"] for user in plugin._get_steam_users()])
+        write_localconfig("2", ["30", "40"])
+        await asyncio.sleep(0.5)
+        results.append(sorted(plugin._get_plugin_managed_appids()))
+    finally:
+        plugin._stop_file_watcher()
+    return results
+
+print(json.dumps(asyncio.run(check())))
+"""
+    with tempfile.TemporaryDirectory() as home_af:
+        result_af = run_plugin_code(home_af, code_af)
+    expected_af = [["10"], True, ["10", "20"], ["2", "1"], ["30", "40"]]
+    match_af = result_af == expected_af
+    print(f"Result:   {result_af}")
+    print(f"Expected: {expected_af}")
+    print(f"\n{'✓ PASS' if match_af else '✗ FAIL'}")
+
     print("\n" + "="*60)
     print("All tests completed!")
     print("="*60)